@@ -0,0 +1,90 @@
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+LAZY_MODULES = ("yt_dlp", "ytmusicapi", "spotipy", "spotipy_anon", "plexapi", "rapidfuzz")
+
+STARTUP_SCRIPT = """
+import sys
+import json
+import time
+
+sys.path.insert(0, sys.argv[1])
+start_time = time.perf_counter()
+import Syncify
+
+import_time = time.perf_counter() - start_time
+response = Syncify.app.test_client().get("/")
+first_request_time = time.perf_counter() - start_time
+print(json.dumps({"import": import_time, "first_request": first_request_time, "status": response.status_code, "loaded": [name for name in sys.argv[2:] if name in sys.modules]}))
+"""
+
+
+def run_startup(python_args=()):
+    with tempfile.TemporaryDirectory() as work_dir:
+        result = subprocess.run([sys.executable, *python_args, "-c", STARTUP_SCRIPT, os.path.abspath(SRC_DIR), *LAZY_MODULES], cwd=work_dir, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def slowest_imports(stderr, count):
+    # -X importtime lists each module after the modules it imports, indented by two spaces per level
+    imports = []
+    direct_imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            direct_imports.append((int(cumulative), name.strip()))
+        elif depth == 0:
+            if name.strip() == "Syncify":
+                imports = direct_imports
+            direct_imports = []
+    return sorted(imports, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark how long Syncify takes to import and answer its first request.")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreter runs to measure.")
+    parser.add_argument("--max-seconds", type=float, default=0.0, help="Fail if the median time to the first request exceeds this many seconds (0 disables the check).")
+    parser.add_argument("--top-imports", type=int, default=10, help="Number of slowest imports made by Syncify to list.")
+    args = parser.parse_args()
+
+    # The first run also fills the bytecode cache, so it is not measured
+    run_startup()
+    results = [run_startup()[0] for _ in range(args.runs)]
+
+    print(f"{'Stage':<28} {'Median':>11}  {'Min':>11}  {'Max':>11}")
+    for stage_name, key in (("import Syncify", "import"), ("first request", "first_request")):
+        timings = [result[key] for result in results]
+        print(f"{stage_name:<28} {statistics.median(timings):>9.3f} s  {min(timings):>9.3f} s  {max(timings):>9.3f} s")
+
+    if args.top_imports:
+        _, stderr = run_startup(("-X", "importtime"))
+        print(f"\n{'Slowest Syncify imports':<28} {'Cumulative':>11}")
+        for cumulative, name in slowest_imports(stderr, args.top_imports):
+            print(f"{name:<28} {cumulative / 1000000:>9.3f} s")
+
+    failures = []
+    loaded_modules = sorted({name for result in results for name in result["loaded"]})
+    if loaded_modules:
+        failures.append(f"Modules that should be imported lazily were loaded at startup: {', '.join(loaded_modules)}")
+    if any(result["status"] != 200 for result in results):
+        failures.append("The first request did not return 200")
+    median_first_request = statistics.median(result["first_request"] for result in results)
+    if args.max_seconds and median_first_request > args.max_seconds:
+        failures.append(f"Median time to the first request {median_first_request:.3f} s exceeds {args.max_seconds:.3f} s")
+
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
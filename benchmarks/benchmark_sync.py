@@ -0,0 +1,226 @@
+import os
+import sys
+import time
+import random
+import logging
+import argparse
+import tempfile
+import threading
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+
+class FakeServiceError(Exception):
+    pass
+
+
+class FakeService:
+    latency = 0.0
+    failure_rate = 0.0
+    random_generator = random.Random(0)
+    lock = threading.Lock()
+
+    @classmethod
+    def call(cls):
+        if cls.latency:
+            time.sleep(cls.latency)
+        with cls.lock:
+            failed = cls.random_generator.random() < cls.failure_rate
+        if failed:
+            raise FakeServiceError("Simulated service failure")
+
+
+class FakeSpotify(FakeService):
+    playlists = {}
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def playlist(self, link, fields=None):
+        self.call()
+        tracks = self.playlists[link]
+        return {"name": link.rsplit(":", 1)[-1], "snapshot_id": f"snapshot-{len(tracks)}", "tracks": {"total": len(tracks)}}
+
+    def playlist_items(self, link, fields=None, limit=100, offset=0):
+        self.call()
+        return {"items": [{"track": track, "added_at": f"2024-01-01T00:00:{index % 60:02d}Z"} for index, track in enumerate(self.playlists[link][offset : offset + limit])]}
+
+
+class FakeYTMusic(FakeService):
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def search(self, query, filter=None, limit=5):
+        self.call()
+        artist, _, title = query.partition(" - ")
+        video_id = f"{abs(hash(query)) % 10**11:011d}"
+        return [{"title": title or query, "videoId": video_id, "artists": [{"name": artist}], "category": "Top result", "resultType": "song"}]
+
+
+class FakeYoutubeDL:
+    download_latency = 0.0
+    download_failure_rate = 0.0
+    transcode_latency = 0.0
+    payload = b"\0" * 1024
+
+    def __init__(self, params=None):
+        self.params = dict(params or {})
+        self.params["outtmpl"] = {"default": self.params.get("outtmpl", "%(title)s.%(ext)s")}
+
+    def extract_info(self, link, download=True, extra_info=None):
+        if self.download_latency:
+            time.sleep(self.download_latency)
+        with FakeService.lock:
+            failed = FakeService.random_generator.random() < self.download_failure_rate
+        if failed:
+            raise FakeServiceError(f"Simulated download failure: {link}")
+
+        file_path = os.path.join(self.params["paths"]["home"], self.params["outtmpl"]["default"].replace("%(ext)s", "webm"))
+        with open(file_path, "wb") as audio_file:
+            audio_file.write(self.payload)
+        return {"id": link.rsplit("=", 1)[-1], "webpage_url": link, "requested_downloads": [{"filepath": file_path}]}
+
+    def post_process(self, file_path, info):
+        if self.transcode_latency:
+            time.sleep(self.transcode_latency)
+        final_path = os.path.join(info["__finaldir"], os.path.splitext(os.path.basename(file_path))[0] + ".mp3")
+        os.replace(file_path, final_path)
+        info["filepath"] = final_path
+        return info
+
+
+def install_fakes():
+    import spotipy
+    import yt_dlp
+    import ytmusicapi
+
+    ytmusicapi.YTMusic = FakeYTMusic
+    spotipy.Spotify = FakeSpotify
+    yt_dlp.YoutubeDL = FakeYoutubeDL
+
+
+def build_playlist(name, track_count, download_folder, existing_fraction):
+    link = f"spotify:playlist:{name}"
+    tracks = [{"name": f"Track {index}", "artists": [{"name": f"Artist {index % 997}"}]} for index in range(track_count)]
+    FakeSpotify.playlists[link] = tracks
+
+    playlist_folder = os.path.join(download_folder, name)
+    os.makedirs(playlist_folder, exist_ok=True)
+    for track in tracks[: int(track_count * existing_fraction)]:
+        open(os.path.join(playlist_folder, f'{track["name"]} - {track["artists"][0]["name"]}.mp3'), "wb").close()
+
+    return {"Name": name, "Link": link, "Priority": 0, "Last_Synced": "Never", "Song_Count": 0}
+
+
+def measure(stage_name, track_count, function):
+    tracemalloc.reset_peak()
+    start_time = time.perf_counter()
+    result = function()
+    wall_time = time.perf_counter() - start_time
+    _, peak_memory = tracemalloc.get_traced_memory()
+    throughput = track_count / wall_time if wall_time else float("inf")
+    print(f"{stage_name:<28} {track_count:>8} tracks  {wall_time:>9.3f} s  {throughput:>10.1f} tracks/s  {peak_memory / 1024 / 1024:>8.1f} MiB peak")
+    return result
+
+
+def run_search_stage(syncify, data_handler, playlist, run_id):
+    search_queue = syncify.FairQueue()
+    download_queue = syncify.FairQueue()
+    sync_state = {"run_id": run_id, "force": True, "skipped": False, "snapshot_id": None, "failed_count": 0, "unmatched_count": 0}
+    search_queue.put(playlist["Name"], (data_handler.get_download_list, (playlist, search_queue, download_queue, sync_state)))
+
+    search_workers = data_handler.start_workers(data_handler.search_worker, data_handler.search_thread_limit, search_queue)
+    search_queue.join()
+    data_handler.stop_workers(search_workers, search_queue)
+    download_queue.close()
+
+    song_list = []
+    while True:
+        song = download_queue.get()
+        if song is None:
+            return song_list
+        song_list.append(song)
+
+
+def run_download_stage(syncify, data_handler, song_list):
+    download_queue = syncify.FairQueue()
+    post_process_queue = syncify.FairQueue(maxsize=data_handler.post_process_thread_limit * 2)
+    for song in song_list:
+        download_queue.put(song["playlist"]["Name"], song)
+
+    download_workers = data_handler.start_workers(data_handler.download_worker, data_handler.download_thread_limit, download_queue, post_process_queue)
+    post_process_workers = data_handler.start_workers(data_handler.post_process_worker, data_handler.post_process_thread_limit, post_process_queue)
+    data_handler.stop_workers(download_workers, download_queue)
+    data_handler.stop_workers(post_process_workers, post_process_queue)
+
+
+def run_benchmark(syncify, track_count, args):
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.chdir(work_dir)
+        data_handler = syncify.DataHandler()
+        data_handler.search_thread_limit = data_handler.max_search_thread_limit = args.search_workers
+        data_handler.download_thread_limit = data_handler.max_download_thread_limit = args.download_workers
+        data_handler.concurrency_limiters = {
+            "search": syncify.AdaptiveLimiter(args.search_workers, args.search_workers),
+            "download": syncify.AdaptiveLimiter(args.download_workers, args.download_workers),
+        }
+        data_handler.post_process_thread_limit = args.post_process_workers
+        data_handler.media_server_tokens = ""
+        data_handler.spotify_client_id = "benchmark"
+        data_handler.spotify_client_secret = "benchmark"
+
+        stage_playlist = build_playlist("Stages", track_count, data_handler.download_folder, args.existing_fraction)
+        missing_count = track_count - int(track_count * args.existing_fraction)
+        run_id, _, _ = data_handler.sync_journal.start_run(True)
+        song_list = measure("get_download_list", track_count, lambda: run_search_stage(syncify, data_handler, stage_playlist, run_id))
+        measure("download + post-process", len(song_list), lambda: run_download_stage(syncify, data_handler, song_list))
+        data_handler.sync_journal.finish_run(run_id)
+
+        data_handler.search_cache.connection.execute("DELETE FROM search_cache")
+        data_handler.sync_list = [build_playlist("MasterQueue", track_count, data_handler.download_folder, args.existing_fraction)]
+        measure("master_queue (cold)", missing_count, lambda: data_handler.master_queue(force=True))
+        measure("master_queue (resync)", track_count, lambda: data_handler.master_queue(force=True))
+        os.chdir(args.start_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Syncify sync hot path against offline stand-ins for Spotify, YTMusic and yt_dlp.")
+    parser.add_argument("--tracks", default="100,10000", help="Comma-separated playlist sizes to benchmark (e.g. 100,10000,100000).")
+    parser.add_argument("--existing-fraction", type=float, default=0.5, help="Fraction of each playlist already present in the download folder.")
+    parser.add_argument("--search-latency", type=float, default=0.0, help="Seconds of latency per Spotify/YTMusic call.")
+    parser.add_argument("--search-failure-rate", type=float, default=0.0, help="Probability that a Spotify/YTMusic call fails.")
+    parser.add_argument("--download-latency", type=float, default=0.0, help="Seconds of latency per yt_dlp download.")
+    parser.add_argument("--download-failure-rate", type=float, default=0.0, help="Probability that a yt_dlp download fails.")
+    parser.add_argument("--transcode-latency", type=float, default=0.0, help="Seconds of latency per yt_dlp post-process.")
+    parser.add_argument("--search-workers", type=int, default=8)
+    parser.add_argument("--download-workers", type=int, default=8)
+    parser.add_argument("--post-process-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--verbose", action="store_true", help="Show Syncify log output.")
+    args = parser.parse_args()
+    args.start_dir = os.getcwd()
+
+    FakeService.latency = args.search_latency
+    FakeService.failure_rate = args.search_failure_rate
+    FakeYoutubeDL.download_latency = args.download_latency
+    FakeYoutubeDL.download_failure_rate = args.download_failure_rate
+    FakeYoutubeDL.transcode_latency = args.transcode_latency
+
+    with tempfile.TemporaryDirectory() as import_dir:
+        os.chdir(import_dir)
+        import Syncify as syncify
+
+        os.chdir(args.start_dir)
+
+    install_fakes()
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.CRITICAL)
+
+    tracemalloc.start()
+    print(f"{'Stage':<28} {'Size':>15}  {'Wall time':>11}  {'Throughput':>19}  {'Memory':>13}")
+    for track_count in [int(size) for size in args.tracks.split(",")]:
+        run_benchmark(syncify, track_count, args)
+
+
+if __name__ == "__main__":
+    main()
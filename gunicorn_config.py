@@ -3,4 +3,9 @@ workers = 1
 threads = 4
 timeout = 120
 worker_class = "geventwebsocket.gunicorn.workers.GeventWebSocketWorker"
- 
+
+
+def post_worker_init(worker):
+    from src.Syncify import data_handler
+
+    data_handler.start_web()
@@ -2,27 +2,1083 @@ import re
 import os
 import sys
 import json
+import atexit
+import hashlib
+import random
 import time
+import shutil
+import socket
+import sqlite3
+import subprocess
 import logging
 import tempfile
 import datetime
 import threading
+import heapq
+import collections
+import itertools
+import contextlib
 import concurrent.futures
 from urllib.parse import urlparse, parse_qs
-from flask import Flask, render_template
+from flask import Flask, Response, render_template, request
 from flask_socketio import SocketIO
-from ytmusicapi import YTMusic
-import yt_dlp
-from plexapi.server import PlexServer
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
-from spotipy_anon import SpotifyAnon
-import requests
-from thefuzz import fuzz
+
+# yt_dlp, ytmusicapi, spotipy, plexapi, requests and rapidfuzz are imported where they are used, so the web server starts without loading them
+
+
+class SearchCache:
+    def __init__(self, db_path, hit_ttl, miss_ttl, max_entries):
+        self.hit_ttl = hit_ttl
+        self.miss_ttl = miss_ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS search_cache (artist TEXT NOT NULL, title TEXT NOT NULL, link TEXT, expires REAL NOT NULL, accessed REAL NOT NULL, PRIMARY KEY (artist, title))")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS search_cache_accessed ON search_cache (accessed)")
+
+    def get(self, artist, title):
+        now = time.time()
+        with self.lock, self.connection:
+            row = self.connection.execute("SELECT link, expires FROM search_cache WHERE artist = ? AND title = ?", (artist, title)).fetchone()
+            if row is None:
+                return False, None
+            if row[1] < now:
+                self.connection.execute("DELETE FROM search_cache WHERE artist = ? AND title = ?", (artist, title))
+                return False, None
+            self.connection.execute("UPDATE search_cache SET accessed = ? WHERE artist = ? AND title = ?", (now, artist, title))
+            return True, row[0]
+
+    def put(self, artist, title, link):
+        now = time.time()
+        expires = now + (self.hit_ttl if link else self.miss_ttl)
+        with self.lock, self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO search_cache (artist, title, link, expires, accessed) VALUES (?, ?, ?, ?, ?)", (artist, title, link, expires, now))
+
+    def evict(self):
+        with self.lock, self.connection:
+            expired = self.connection.execute("DELETE FROM search_cache WHERE expires < ?", (time.time(),)).rowcount
+            overflow = self.connection.execute("DELETE FROM search_cache WHERE rowid IN (SELECT rowid FROM search_cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)", (self.max_entries,)).rowcount
+        return expired + overflow
+
+
+class LibraryIndex:
+    def __init__(self, db_path, name_cleaner):
+        self.name_cleaner = name_cleaner
+        self.folders = {}
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS library_folders (folder TEXT PRIMARY KEY, mtime INTEGER NOT NULL)")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS library_files (folder TEXT NOT NULL, file_name TEXT NOT NULL, name TEXT NOT NULL, PRIMARY KEY (folder, file_name))")
+
+    def get_names(self, folder_path):
+        with self.lock:
+            return self.refresh(folder_path)["names"]
+
+    def load(self, folder):
+        row = self.connection.execute("SELECT mtime FROM library_folders WHERE folder = ?", (folder,)).fetchone()
+        if row is None:
+            return None
+        files = dict(self.connection.execute("SELECT file_name, name FROM library_files WHERE folder = ?", (folder,)).fetchall())
+        return {"mtime": row[0], "files": files, "names": set(files.values())}
+
+    def refresh(self, folder_path):
+        folder = os.path.abspath(folder_path)
+        mtime = os.stat(folder).st_mtime_ns
+        entry = self.folders.get(folder)
+        if entry is None:
+            entry = self.load(folder)
+
+        if entry is not None and entry["mtime"] == mtime:
+            self.folders[folder] = entry
+            return entry
+
+        known_files = entry["files"] if entry else {}
+        file_names = os.listdir(folder)
+        added_files = [file_name for file_name in file_names if file_name not in known_files]
+        removed_files = set(known_files).difference(file_names)
+        added_entries = dict(zip(added_files, self.name_cleaner(added_files)))
+
+        files = {file_name: known_files[file_name] if file_name in known_files else added_entries[file_name] for file_name in file_names}
+        entry = {"mtime": mtime, "files": files, "names": set(files.values())}
+        self.folders[folder] = entry
+
+        with self.connection:
+            self.connection.executemany("DELETE FROM library_files WHERE folder = ? AND file_name = ?", [(folder, file_name) for file_name in removed_files])
+            self.connection.executemany("INSERT OR REPLACE INTO library_files (folder, file_name, name) VALUES (?, ?, ?)", [(folder, file_name, name) for file_name, name in added_entries.items()])
+            self.connection.execute("INSERT OR REPLACE INTO library_folders (folder, mtime) VALUES (?, ?)", (folder, mtime))
+
+        return entry
+
+
+class TrackStore:
+    def __init__(self, db_path):
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS tracks (video_id TEXT PRIMARY KEY, path TEXT NOT NULL, updated REAL NOT NULL)")
+
+    def get(self, video_id):
+        with self.lock:
+            row = self.connection.execute("SELECT path FROM tracks WHERE video_id = ?", (video_id,)).fetchone()
+        if row is None or not os.path.exists(row[0]):
+            return None
+        return row[0]
+
+    def put(self, video_id, path):
+        with self.lock, self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO tracks (video_id, path, updated) VALUES (?, ?, ?)", (video_id, path, time.time()))
+
+
+class SyncJournal:
+    def __init__(self, db_path, max_retries):
+        self.max_retries = max_retries
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS sync_runs (run_id INTEGER PRIMARY KEY AUTOINCREMENT, started REAL NOT NULL, force INTEGER NOT NULL)")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS sync_playlists (run_id INTEGER NOT NULL, playlist TEXT NOT NULL, snapshot_id TEXT, PRIMARY KEY (run_id, playlist))")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS sync_tracks (run_id INTEGER NOT NULL, playlist TEXT NOT NULL, title TEXT NOT NULL, artist TEXT, song_title TEXT, isrc TEXT, duration REAL, link TEXT, state TEXT NOT NULL, retries INTEGER NOT NULL DEFAULT 0, updated REAL NOT NULL, PRIMARY KEY (run_id, playlist, title))")
+            # Journals written before ISRC matching lack the isrc and duration columns
+            track_columns = {row[1] for row in self.connection.execute("PRAGMA table_info(sync_tracks)")}
+            for column, column_type in (("isrc", "TEXT"), ("duration", "REAL")):
+                if column not in track_columns:
+                    self.connection.execute(f"ALTER TABLE sync_tracks ADD COLUMN {column} {column_type}")
+
+    def start_run(self, force, run_id=None):
+        with self.lock, self.connection:
+            if run_id is not None:
+                row = self.connection.execute("SELECT run_id, force FROM sync_runs WHERE run_id = ?", (run_id,)).fetchone()
+                if row:
+                    return row[0], bool(row[1]), True
+            cursor = self.connection.execute("INSERT INTO sync_runs (run_id, started, force) VALUES (?, ?, ?)", (run_id, time.time(), int(force)))
+            return cursor.lastrowid, force, False
+
+    def finish_run(self, run_id):
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM sync_runs WHERE run_id = ?", (run_id,))
+            self.connection.execute("DELETE FROM sync_tracks WHERE run_id = ?", (run_id,))
+            self.connection.execute("DELETE FROM sync_playlists WHERE run_id = ?", (run_id,))
+
+    def get_playlist(self, run_id, playlist):
+        with self.lock:
+            row = self.connection.execute("SELECT snapshot_id FROM sync_playlists WHERE run_id = ? AND playlist = ?", (run_id, playlist)).fetchone()
+            if row is None:
+                return None, None
+            columns = ("title", "artist", "song_title", "isrc", "duration", "link", "state", "retries")
+            tracks = [dict(zip(columns, track)) for track in self.connection.execute(f"SELECT {', '.join(columns)} FROM sync_tracks WHERE run_id = ? AND playlist = ?", (run_id, playlist))]
+            return row[0], tracks
+
+    def add_playlist(self, run_id, playlist, snapshot_id):
+        with self.lock, self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO sync_playlists (run_id, playlist, snapshot_id) VALUES (?, ?, ?)", (run_id, playlist, snapshot_id))
+
+    def add_tracks(self, run_id, playlist, tracks):
+        now = time.time()
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO sync_tracks (run_id, playlist, title, artist, song_title, isrc, duration, link, state, retries, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?)",
+                [(run_id, playlist, track["title"], track["artist"], track["song_title"], track.get("isrc"), track.get("duration"), track["link"], track["state"], now) for track in tracks],
+            )
+
+    def set_track_state(self, run_id, playlist, title, state, link=None):
+        retry_increment = 1 if state == "failed" else 0
+        with self.lock, self.connection:
+            self.connection.execute(
+                "UPDATE sync_tracks SET state = ?, link = COALESCE(?, link), retries = retries + ?, updated = ? WHERE run_id = ? AND playlist = ? AND title = ?",
+                (state, link, retry_increment, time.time(), run_id, playlist, title),
+            )
+
+
+class JobQueue:
+    def __init__(self, db_path, stale_after=60):
+        self.stale_after = stale_after
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        with self.lock:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS jobs (job_id INTEGER PRIMARY KEY AUTOINCREMENT, command TEXT NOT NULL, payload TEXT NOT NULL, state TEXT NOT NULL, worker TEXT, created REAL NOT NULL, heartbeat REAL)")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS events (event_id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, payload TEXT NOT NULL, created REAL NOT NULL)")
+
+    def submit(self, command, payload):
+        with self.lock:
+            cursor = self.connection.execute("INSERT INTO jobs (command, payload, state, created) VALUES (?, ?, 'pending', ?)", (command, json.dumps(payload), time.time()))
+            return cursor.lastrowid
+
+    def active_jobs(self):
+        with self.lock:
+            rows = self.connection.execute("SELECT job_id, command, payload, state FROM jobs WHERE state IN ('pending', 'running') ORDER BY job_id").fetchall()
+        return [{"job_id": job_id, "command": command, "payload": json.loads(payload), "state": state} for job_id, command, payload, state in rows]
+
+    def claim(self, worker):
+        now = time.time()
+        with self.lock:
+            # BEGIN IMMEDIATE takes the write lock up front so two workers can never claim the same job
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.connection.execute(
+                    "SELECT job_id, command, payload FROM jobs WHERE state = 'pending' OR (state = 'running' AND heartbeat < ?) ORDER BY job_id LIMIT 1",
+                    (now - self.stale_after,),
+                ).fetchone()
+                if row:
+                    self.connection.execute("UPDATE jobs SET state = 'running', worker = ?, heartbeat = ? WHERE job_id = ?", (worker, now, row[0]))
+                self.connection.execute("COMMIT")
+
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+
+        if row is None:
+            return None
+        return {"job_id": row[0], "command": row[1], "payload": json.loads(row[2])}
+
+    def heartbeat(self, job_id, worker):
+        with self.lock:
+            self.connection.execute("UPDATE jobs SET heartbeat = ? WHERE job_id = ? AND state = 'running' AND worker = ?", (time.time(), job_id, worker))
+
+    def complete(self, job_id):
+        with self.lock:
+            self.connection.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+    def publish(self, name, payload):
+        with self.lock:
+            self.connection.execute("INSERT INTO events (name, payload, created) VALUES (?, ?, ?)", (name, json.dumps(payload), time.time()))
+
+    def consume_events(self):
+        with self.lock:
+            rows = self.connection.execute("SELECT event_id, name, payload FROM events ORDER BY event_id").fetchall()
+            if rows:
+                self.connection.execute("DELETE FROM events WHERE event_id <= ?", (rows[-1][0],))
+        return [(name, json.loads(payload)) for _, name, payload in rows]
+
+
+class ArtworkCache:
+    def __init__(self, folder, ffmpeg_location, crop, max_age):
+        self.folder = folder
+        self.ffmpeg_location = ffmpeg_location
+        self.crop = crop
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.key_locks = {}
+        os.makedirs(self.folder, exist_ok=True)
+
+    def get_path(self, key):
+        digest = hashlib.sha1(f"{key}|crop={self.crop}".encode("utf-8")).hexdigest()
+        return os.path.join(self.folder, f"{digest}.jpg")
+
+    def get(self, key, url):
+        path = self.get_path(key)
+        with self.lock:
+            key_lock = self.key_locks.setdefault(path, threading.Lock())
+
+        # Tracks of the same album wait for the first one instead of fetching the same art again
+        with key_lock:
+            if os.path.exists(path):
+                os.utime(path)
+                return path, True
+
+            import requests
+
+            response = requests.get(url, timeout=30)
+            response.raise_for_status()
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as image_file:
+                image_file.write(response.content)
+            try:
+                self.convert(temp_path, path)
+
+            finally:
+                os.remove(temp_path)
+            return path, False
+
+    def convert(self, source_path, path):
+        filters = ["-vf", "crop='if(gt(ih,iw),iw,ih)':'if(gt(iw,ih),ih,iw)'"] if self.crop else []
+        temp_path = f"{path}.{threading.get_ident()}.jpg"
+        subprocess.run([self.ffmpeg_location, "-y", "-loglevel", "error", "-i", source_path, *filters, "-frames:v", "1", "-c:v", "mjpeg", "-q:v", "2", temp_path], check=True, capture_output=True)
+        os.replace(temp_path, path)
+
+    def evict(self):
+        evicted_count = 0
+        cutoff = time.time() - self.max_age
+        for entry in os.scandir(self.folder):
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                evicted_count += 1
+        with self.lock:
+            self.key_locks.clear()
+        return evicted_count
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity else max(rate, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, amount=1):
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait_time = (amount - self.tokens) / self.rate
+            time.sleep(wait_time)
+
+
+class BandwidthLimiter:
+    RATE_PATTERN = re.compile(r"^(\d+(?:\.\d+)?)\s*([KMG]?)(?:i?B)?$", re.IGNORECASE)
+    RATE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+
+    def __init__(self, default_rate, schedule=""):
+        self.default_rate = self.parse_rate(default_rate)
+        self.schedule = []
+        for entry in filter(None, (entry.strip() for entry in schedule.split(","))):
+            hours, _, rate = entry.partition("=")
+            start_hour, _, end_hour = hours.partition("-")
+            self.schedule.append((int(start_hour) % 24, int(end_hour or start_hour) % 24, self.parse_rate(rate)))
+        self.condition = threading.Condition()
+        self.waiters = collections.deque()
+        self.tokens = 0
+        self.updated = time.monotonic()
+
+    @classmethod
+    def parse_rate(cls, rate):
+        rate_match = cls.RATE_PATTERN.match(str(rate).strip())
+        if not rate_match:
+            raise ValueError(f"Invalid bandwidth limit: {rate}")
+        amount, unit = rate_match.groups()
+        return float(amount) * cls.RATE_UNITS[unit.upper()]
+
+    @property
+    def enabled(self):
+        return self.default_rate > 0 or any(rate > 0 for _, _, rate in self.schedule)
+
+    def current_rate(self):
+        hour = datetime.datetime.now().hour
+        for start_hour, end_hour, rate in self.schedule:
+            in_window = start_hour <= hour < end_hour if start_hour < end_hour else hour >= start_hour or hour < end_hour
+            if in_window:
+                return rate
+        return self.default_rate
+
+    def acquire(self, amount):
+        rate = self.current_rate()
+        if rate <= 0 or amount <= 0:
+            return
+
+        # Waiters are served in arrival order, so downloads reading equal sized blocks get an equal share
+        ticket = object()
+        with self.condition:
+            self.waiters.append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self.tokens = min(rate, self.tokens + (now - self.updated) * rate)
+                    self.updated = now
+                    if self.waiters[0] is ticket and self.tokens >= min(amount, rate):
+                        self.tokens -= amount
+                        return
+                    self.condition.wait((min(amount, rate) - self.tokens) / rate if self.waiters[0] is ticket else None)
+
+            finally:
+                self.waiters.remove(ticket)
+                self.condition.notify_all()
+
+
+class AdaptiveLimiter:
+    THROTTLE_PATTERN = re.compile(r"\b429\b|too many requests|rate.?limit|sign in to confirm", re.IGNORECASE)
+    TRANSIENT_PATTERN = re.compile(r"timed? ?out|connection (reset|refused|aborted)|temporar|\b50[234]\b|remote end closed", re.IGNORECASE)
+
+    def __init__(self, initial_limit, max_limit, max_attempts=4, base_delay=1, max_delay=60, slow_factor=3):
+        self.max_limit = max(max_limit, 1)
+        self.limit = float(min(max(initial_limit, 1), self.max_limit))
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.slow_factor = slow_factor
+        self.condition = threading.Condition()
+        self.in_flight = 0
+        self.average_latency = None
+        self.consecutive_throttles = 0
+        self.backoff_until = 0
+
+    def acquire(self):
+        with self.condition:
+            while True:
+                backoff = self.backoff_until - time.monotonic()
+                if backoff <= 0 and self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                self.condition.wait(backoff if backoff > 0 else None)
+
+    def release(self, latency, outcome):
+        with self.condition:
+            self.in_flight -= 1
+            if outcome == "throttled":
+                self.consecutive_throttles += 1
+                self.limit = max(1.0, self.limit / 2)
+                self.backoff_until = time.monotonic() + self.backoff_delay(self.consecutive_throttles)
+            elif outcome == "success":
+                self.consecutive_throttles = 0
+                slow = bool(self.slow_factor) and self.average_latency is not None and latency > self.average_latency * self.slow_factor
+                self.average_latency = latency if self.average_latency is None else self.average_latency * 0.9 + latency * 0.1
+                if slow:
+                    self.limit = max(1.0, self.limit * 0.75)
+                else:
+                    # Additive increase of roughly one slot per limit-sized batch of successful calls
+                    self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+    def backoff_delay(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def classify(self, error):
+        import requests
+
+        message = str(error)
+        if self.THROTTLE_PATTERN.search(message):
+            return "throttled"
+        if isinstance(error, (requests.ConnectionError, requests.Timeout, TimeoutError)) or self.TRANSIENT_PATTERN.search(message):
+            return "transient"
+        return "failed"
+
+    def call(self, func, *args, **kwargs):
+        for attempt in range(1, self.max_attempts + 1):
+            self.acquire()
+            start_time = time.monotonic()
+            try:
+                result = func(*args, **kwargs)
+
+            except Exception as e:
+                outcome = self.classify(e)
+                self.release(time.monotonic() - start_time, outcome)
+                if outcome == "failed" or attempt == self.max_attempts:
+                    raise
+                time.sleep(self.backoff_delay(attempt))
+
+            else:
+                self.release(time.monotonic() - start_time, "success")
+                return result
+
+    def state(self):
+        with self.condition:
+            return {"limit": int(self.limit), "max_limit": self.max_limit, "in_flight": self.in_flight, "backoff": round(max(0, self.backoff_until - time.monotonic()), 1)}
+
+
+class FairQueue:
+    def __init__(self, maxsize=0):
+        self.maxsize = maxsize
+        self.lanes = {}
+        self.priorities = {}
+        self.size = 0
+        self.unfinished_tasks = 0
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def put(self, lane, item, priority=0):
+        with self.condition:
+            while self.maxsize and self.size >= self.maxsize:
+                self.condition.wait()
+            self.lanes.setdefault(lane, collections.deque()).append(item)
+            self.priorities[lane] = priority
+            self.size += 1
+            self.unfinished_tasks += 1
+            self.condition.notify_all()
+
+    def get(self):
+        with self.condition:
+            while not self.size:
+                if self.closed:
+                    return None
+                self.condition.wait()
+
+            top_priority = max(self.priorities.values())
+            lane = next(lane for lane in self.lanes if self.priorities[lane] == top_priority)
+            items = self.lanes.pop(lane)
+            item = items.popleft()
+            if items:
+                # Move the lane to the back so playlists with the same priority take turns
+                self.lanes[lane] = items
+            else:
+                del self.priorities[lane]
+            self.size -= 1
+            self.condition.notify_all()
+            return item
+
+    def task_done(self):
+        with self.condition:
+            self.unfinished_tasks -= 1
+            if not self.unfinished_tasks:
+                self.condition.notify_all()
+
+    def join(self):
+        with self.condition:
+            while self.unfinished_tasks:
+                self.condition.wait()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class ClientPool:
+    def __init__(self):
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.spotify_auth_managers = {}
+
+    def ytmusic(self):
+        client = getattr(self.local, "ytmusic", None)
+        if client is None:
+            from ytmusicapi import YTMusic
+
+            client = self.local.ytmusic = YTMusic()
+        return client
+
+    def spotify(self, client_id, client_secret):
+        from spotipy.oauth2 import SpotifyClientCredentials
+        from spotipy.cache_handler import MemoryCacheHandler
+
+        return self.get_spotify_client((client_id, client_secret), lambda: SpotifyClientCredentials(client_id=client_id, client_secret=client_secret, cache_handler=MemoryCacheHandler()))
+
+    def spotify_anonymous(self):
+        from spotipy_anon import SpotifyAnon
+
+        return self.get_spotify_client(None, SpotifyAnon)
+
+    def get_spotify_client(self, key, auth_manager_factory):
+        clients = self.local.__dict__.setdefault("spotify", {})
+        client = clients.get(key)
+        if client is None:
+            with self.lock:
+                auth_manager = self.spotify_auth_managers.get(key)
+                if auth_manager is None:
+                    auth_manager = self.spotify_auth_managers[key] = auth_manager_factory()
+            import spotipy
+
+            client = clients[key] = spotipy.Spotify(auth_manager=auth_manager)
+        return client
+
+    def youtube_dl(self, name, ydl_opts_factory):
+        clients = self.local.__dict__.setdefault("youtube_dl", {})
+        client = clients.get(name)
+        if client is None:
+            import yt_dlp
+
+            client = clients[name] = yt_dlp.YoutubeDL(ydl_opts_factory())
+        return client
+
+
+class Metrics:
+    DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.definitions = {}
+        self.values = {}
+
+    def describe(self, name, metric_type, help_text, buckets=None):
+        self.definitions[name] = (metric_type, help_text, tuple(buckets or self.DEFAULT_BUCKETS))
+        self.values.setdefault(name, {})
+
+    def inc(self, name, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            series = self.values[name]
+            series[key] = series.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.values[name][key] = value
+
+    def observe(self, name, value, **labels):
+        key = tuple(sorted(labels.items()))
+        buckets = self.definitions[name][2]
+        with self.lock:
+            series = self.values[name]
+            observation = series.get(key)
+            if observation is None:
+                observation = series[key] = {"buckets": [0] * len(buckets), "sum": 0.0, "count": 0}
+            for index, upper_bound in enumerate(buckets):
+                if value <= upper_bound:
+                    observation["buckets"][index] += 1
+            observation["sum"] += value
+            observation["count"] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return [[name, [list(label) for label in labels], value] for name, series in self.values.items() for labels, value in series.items()]
+
+    def format_labels(self, labels):
+        if not labels:
+            return ""
+        escaped_labels = [(key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for key, value in labels]
+        return "{" + ",".join(f'{key}="{value}"' for key, value in escaped_labels) + "}"
+
+    def render(self, worker_snapshots=()):
+        lines = []
+        with self.lock:
+            series_by_name = {name: list(series.items()) for name, series in self.values.items()}
+            # Metrics of separate sync worker processes are rendered as their own series with a worker label
+            for worker, snapshot in worker_snapshots:
+                for name, labels, value in snapshot:
+                    if name in series_by_name:
+                        series_by_name[name].append((tuple(sorted([tuple(label) for label in labels] + [("worker", worker)])), value))
+
+            for name, (metric_type, help_text, buckets) in self.definitions.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in series_by_name[name]:
+                    if metric_type != "histogram":
+                        lines.append(f"{name}{self.format_labels(labels)} {value}")
+                        continue
+                    for upper_bound, bucket_count in zip(buckets, value["buckets"]):
+                        lines.append(f"{name}_bucket{self.format_labels(labels + (('le', upper_bound),))} {bucket_count}")
+                    lines.append(f"{name}_bucket{self.format_labels(labels + (('le', '+Inf'),))} {value['count']}")
+                    lines.append(f"{name}_sum{self.format_labels(labels)} {value['sum']}")
+                    lines.append(f"{name}_count{self.format_labels(labels)} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+
+class SyncTrace:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.events = []
+        self.thread_ids = {}
+        self.pid = os.getpid()
+        self.start_time = time.perf_counter()
+        self.local = threading.local()
+
+    def timestamp(self):
+        return round((time.perf_counter() - self.start_time) * 1000000, 1)
+
+    def add(self, event):
+        thread = threading.current_thread()
+        with self.lock:
+            thread_id = self.thread_ids.get(thread.ident)
+            if thread_id is None:
+                # Small sequential ids keep the trace viewer tracks readable, the thread names are added as metadata
+                thread_id = self.thread_ids[thread.ident] = len(self.thread_ids) + 1
+                self.events.append({"name": "thread_name", "ph": "M", "pid": self.pid, "tid": thread_id, "args": {"name": f"{thread.name} ({thread.ident})"}})
+            event.update(pid=self.pid, tid=thread_id)
+            self.events.append(event)
+
+    def add_span(self, name, category, start, **args):
+        self.add({"name": name, "cat": category, "ph": "X", "ts": start, "dur": round(self.timestamp() - start, 1), "args": args})
+
+    @contextlib.contextmanager
+    def span(self, name, category, **args):
+        start = self.timestamp()
+        try:
+            yield args
+
+        except BaseException as e:
+            args["error"] = str(e)
+            raise
+
+        finally:
+            self.add_span(name, category, start, **args)
+
+    def begin(self, name, category, span_id, **args):
+        self.add({"name": name, "cat": category, "ph": "b", "id": span_id, "ts": self.timestamp(), "args": args})
+
+    def end(self, name, category, span_id, **args):
+        self.add({"name": name, "cat": category, "ph": "e", "id": span_id, "ts": self.timestamp(), "args": args})
+
+    def start_step(self, name):
+        self.local.steps = getattr(self.local, "steps", {})
+        self.local.steps[name] = self.timestamp()
+
+    def finish_step(self, name, category, **args):
+        start = getattr(self.local, "steps", {}).pop(name, None)
+        if start is not None:
+            self.add_span(name, category, start, **args)
+
+    def save(self):
+        with self.lock:
+            events = [{"name": "process_name", "ph": "M", "pid": self.pid, "tid": 0, "args": {"name": "Syncify"}}] + self.events
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as trace_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, trace_file)
+        os.replace(temp_path, self.path)
+
+
+class TrackMatcher:
+    INVALID_CHARACTERS = re.compile(r'[\/:*?"<>|]')
+    REPEATED_WHITESPACE = re.compile(r"\s+")
+    MATCH_THRESHOLD = 90
+    TOP_RESULT_THRESHOLD = 40
+    DURATION_TOLERANCE = 3
+
+    @classmethod
+    def clean(cls, text):
+        return cls.REPEATED_WHITESPACE.sub(" ", cls.INVALID_CHARACTERS.sub(" ", text)).strip()
+
+    def normalize(self, text):
+        return self.clean(text).lower()
+
+    def matches_duration(self, item, duration):
+        item_duration = item.get("duration_seconds")
+        return item_duration is not None and abs(item_duration - duration) <= self.DURATION_TOLERANCE
+
+    def normalize_artists(self, artists):
+        return ", ".join(self.normalize(artist["name"]) for artist in artists or [])
+
+    def batch_ratio(self, query, choices):
+        from rapidfuzz import fuzz, process
+
+        scores = [0] * len(choices)
+        for _, score, index in process.extract(query, choices, scorer=fuzz.ratio, processor=None, limit=None):
+            scores[index] = round(score)
+        return scores
+
+    def rank(self, title, artist, search_results):
+        cleaned_title = self.normalize(title)
+        cleaned_artist = self.normalize(artist)
+        candidate_titles = [self.normalize(item["title"]) for item in search_results]
+        candidate_artists = [self.normalize_artists(item.get("artists")) for item in search_results]
+        title_scores = self.batch_ratio(cleaned_title, candidate_titles)
+        artist_scores = self.batch_ratio(cleaned_artist, candidate_artists)
+
+        ranked_results = []
+        for index, item in enumerate(search_results):
+            title_score = 100 if all(word in cleaned_title for word in candidate_titles[index].split()) else title_scores[index]
+            artist_score = 100 if cleaned_artist in candidate_artists[index] else artist_scores[index]
+            if cleaned_title in candidate_titles[index]:
+                outcome = "exact"
+            elif title_score >= self.MATCH_THRESHOLD and artist_score >= self.MATCH_THRESHOLD:
+                outcome = "fuzzy"
+            else:
+                outcome = None
+            ranked_results.append({"videoId": item["videoId"], "item": item, "title_score": title_score, "artist_score": artist_score, "outcome": outcome, "position": index})
+
+        # Within each outcome YouTube Music's own order wins, the same song is picked as by the original first match search
+        outcome_order = {"exact": 0, "fuzzy": 1, None: 2}
+        ranked_results.sort(key=lambda result: (outcome_order[result["outcome"]], result["position"]))
+        return ranked_results
+
+    def match_top_result(self, title, artist, top_result):
+        from rapidfuzz import fuzz
+
+        cleaned_title = self.normalize(title)
+        cleaned_artist = self.normalize(artist)
+        candidate_title = self.normalize(top_result["title"])
+        candidate_artists = self.normalize_artists(top_result.get("artists"))
+        title_score = 100 if cleaned_title in candidate_title else round(fuzz.ratio(cleaned_title, candidate_title))
+        artist_score = 100 if cleaned_artist in candidate_artists else round(fuzz.ratio(cleaned_artist, candidate_artists))
+        return (title_score >= self.MATCH_THRESHOLD and artist_score >= self.TOP_RESULT_THRESHOLD) or (title_score >= self.TOP_RESULT_THRESHOLD and artist_score >= self.MATCH_THRESHOLD)
+
+
+class ProgressTracker:
+    def __init__(self, emit, interval, state=None):
+        self.emit = emit
+        self.interval = interval
+        self.state = state
+        self.last_state = None
+        self.lock = threading.Lock()
+        self.tracks = {}
+        self.changed_tracks = set()
+        self.stop_event = threading.Event()
+        self.flush_thread = None
+
+    def update(self, key, status, percent=None, speed=None, eta=None):
+        # The same song can be downloaded for several playlists at once, so entries are keyed by (playlist, title)
+        playlist, track = key
+        with self.lock:
+            self.tracks[key] = {"id": f"{playlist}/{track}", "playlist": playlist, "track": track, "status": status, "percent": percent, "speed": speed, "eta": eta}
+            self.changed_tracks.add(key)
+
+    def flush(self):
+        with self.lock:
+            events = []
+            for key in self.changed_tracks:
+                events.append(self.tracks[key])
+                if self.tracks[key]["status"] in ("done", "failed"):
+                    del self.tracks[key]
+            self.changed_tracks.clear()
+        state = self.state() if self.state else None
+        if events or state != self.last_state:
+            self.last_state = state
+            self.emit(events, state)
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            self.flush()
+
+    def start(self):
+        self.stop_event.clear()
+        self.flush_thread = threading.Thread(target=self.run, daemon=True)
+        self.flush_thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.flush_thread:
+            self.flush_thread.join()
+        self.flush()
+
+
+class SyncSchedule:
+    INTERVAL_PATTERN = re.compile(r"^(\d+)\s*([mhd])$", re.IGNORECASE)
+    INTERVAL_UNITS = {"m": "minutes", "h": "hours", "d": "days"}
+    CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, spec):
+        self.spec = spec.strip()
+        self.interval = None
+        interval_match = self.INTERVAL_PATTERN.match(self.spec)
+        if interval_match:
+            amount, unit = interval_match.groups()
+            self.interval = datetime.timedelta(**{self.INTERVAL_UNITS[unit.lower()]: int(amount)})
+            if not self.interval:
+                raise ValueError(f"Interval must be greater than zero: {spec}")
+            return
+
+        fields = self.spec.split()
+        if len(fields) != 5:
+            raise ValueError(f"Expected an interval like 6h or a cron expression with 5 fields: {spec}")
+        self.minutes, self.hours, self.days, self.months, self.weekdays = [self.parse_field(field, low, high) for field, (low, high) in zip(fields, self.CRON_FIELDS)]
+        self.weekdays = {weekday % 7 for weekday in self.weekdays}
+        self.days_restricted = fields[2] != "*"
+        self.weekdays_restricted = fields[4] != "*"
+
+    @staticmethod
+    def parse_field(field, low, high):
+        values = set()
+        for part in field.split(","):
+            value_range, _, step = part.partition("/")
+            if value_range == "*":
+                start, end = low, high
+            elif "-" in value_range:
+                start, end = (int(value) for value in value_range.split("-", 1))
+            else:
+                start = end = int(value_range)
+                if step:
+                    end = high
+            if start < low or end > high or start > end:
+                raise ValueError(f"Value out of range {low}-{high}: {part}")
+            values.update(range(start, end + 1, int(step) if step else 1))
+        return values
+
+    def day_matches(self, date):
+        if date.month not in self.months:
+            return False
+        day_match = date.day in self.days
+        weekday_match = (date.weekday() + 1) % 7 in self.weekdays
+        if self.days_restricted and self.weekdays_restricted:
+            return day_match or weekday_match
+        return day_match and weekday_match
+
+    def next_run(self, after):
+        if self.interval:
+            return after + self.interval
+
+        start = after.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        for day_offset in range(366 * 4 + 1):
+            date = start.date() + datetime.timedelta(days=day_offset)
+            if not self.day_matches(date):
+                continue
+            for hour in sorted(self.hours):
+                if day_offset == 0 and hour < start.hour:
+                    continue
+                for minute in sorted(self.minutes):
+                    if day_offset == 0 and hour == start.hour and minute < start.minute:
+                        continue
+                    return datetime.datetime.combine(date, datetime.time(hour, minute))
+        raise ValueError(f"Schedule never runs: {self.spec}")
+
+
+class SyncScheduler:
+    MAX_WAIT = 3600
+
+    def __init__(self, dispatch, logger, retry_delay=60):
+        self.dispatch = dispatch
+        self.logger = logger
+        self.retry_delay = datetime.timedelta(seconds=retry_delay)
+        self.condition = threading.Condition()
+        self.schedules = {}
+        self.last_runs = {}
+        self.heap = []
+
+    def update(self, jobs):
+        now = datetime.datetime.now()
+        with self.condition:
+            previous_schedules = self.schedules
+            previous_dues = {name: due for due, name in self.heap}
+            self.schedules = {name: schedule for name, (schedule, _) in jobs.items()}
+            self.heap = []
+            for name, (schedule, last_run) in jobs.items():
+                last_run = max(filter(None, (last_run, self.last_runs.get(name))), default=None)
+                previous_schedule = previous_schedules.get(name)
+                if last_run:
+                    # Missed runs are caught up once as soon as possible instead of being replayed one by one
+                    due = max(schedule.next_run(last_run), now)
+                elif name in previous_dues and previous_schedule and previous_schedule.spec == schedule.spec:
+                    # Rebuilding the schedule must not push back the first run of a playlist that was never synced
+                    due = previous_dues[name]
+                else:
+                    due = schedule.next_run(now)
+                heapq.heappush(self.heap, (due, name))
+            self.condition.notify()
+
+    def next_due(self):
+        with self.condition:
+            return self.heap[0] if self.heap else None
+
+    def run(self):
+        while True:
+            with self.condition:
+                while True:
+                    now = datetime.datetime.now()
+                    if self.heap and self.heap[0][0] <= now:
+                        break
+                    timeout = min((self.heap[0][0] - now).total_seconds(), self.MAX_WAIT) if self.heap else None
+                    self.condition.wait(timeout)
+
+                due_names = []
+                while self.heap and self.heap[0][0] <= now:
+                    due_names.append(heapq.heappop(self.heap)[1])
+
+            try:
+                started = self.dispatch(due_names)
+
+            except Exception as e:
+                # A failed dispatch must not stop the scheduler thread, the playlists are retried after retry_delay
+                self.logger.error(f"Error Dispatching Scheduled Sync: {str(e)}")
+                started = False
+
+            now = datetime.datetime.now()
+            with self.condition:
+                if started:
+                    self.last_runs.update((name, now) for name in due_names)
+                # The schedule may have been rebuilt while the sync was running
+                self.heap = [entry for entry in self.heap if entry[1] not in due_names]
+                heapq.heapify(self.heap)
+                for name in due_names:
+                    schedule = self.schedules.get(name)
+                    if schedule:
+                        heapq.heappush(self.heap, (schedule.next_run(now) if started else now + self.retry_delay, name))
+
+    def start(self):
+        scheduler_thread = threading.Thread(target=self.run, daemon=True)
+        scheduler_thread.start()
+
+
+class ConfigWriter:
+    def __init__(self, logger, delay=1, max_delay=10):
+        self.logger = logger
+        self.delay = delay
+        self.max_delay = max_delay
+        self.condition = threading.Condition()
+        self.write_lock = threading.Lock()
+        self.pending = {}
+        self.first_request = None
+        self.last_request = None
+        writer_thread = threading.Thread(target=self.run, daemon=True)
+        writer_thread.start()
+
+    def write(self, path, snapshot):
+        with self.condition:
+            now = time.monotonic()
+            self.pending[path] = snapshot
+            self.first_request = self.first_request or now
+            self.last_request = now
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while True:
+                    if not self.pending:
+                        self.condition.wait()
+                        continue
+                    now = time.monotonic()
+                    # Wait for changes to settle, but never hold back a write for longer than max_delay
+                    remaining = min(self.last_request + self.delay, self.first_request + self.max_delay) - now
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+            self.flush()
+
+    def flush(self):
+        with self.write_lock:
+            with self.condition:
+                pending = self.pending
+                self.pending = {}
+                self.first_request = None
+
+            for path, snapshot in pending.items():
+                try:
+                    self.write_atomic(path, snapshot())
+
+                except Exception as e:
+                    self.logger.error(f"Error Writing Config File {path}: {str(e)}")
+                    with self.condition:
+                        self.pending.setdefault(path, snapshot)
+                        self.first_request = self.first_request or time.monotonic()
+
+    @staticmethod
+    def write_atomic(path, data):
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as json_file:
+            json.dump(data, json_file, indent=4)
+            json_file.flush()
+            os.fsync(json_file.fileno())
+        os.replace(temp_path, path)
+
+
+class MediaScanDebouncer:
+    def __init__(self, scan, delay, max_delay):
+        self.scan = scan
+        self.delay = delay
+        self.max_delay = max(max_delay, delay)
+        self.condition = threading.Condition()
+        self.pending_folders = set()
+        self.first_request = None
+        self.last_request = None
+        scan_thread = threading.Thread(target=self.run, daemon=True)
+        scan_thread.start()
+
+    def request(self, folders):
+        with self.condition:
+            now = time.monotonic()
+            self.pending_folders.update(folders)
+            self.first_request = self.first_request or now
+            self.last_request = now
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while True:
+                    if not self.pending_folders:
+                        self.condition.wait()
+                        continue
+                    remaining = min(self.last_request + self.delay, self.first_request + self.max_delay) - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                folders = self.pending_folders
+                self.pending_folders = set()
+                self.first_request = None
+            self.scan(sorted(folders))
 
 
 class DataHandler:
     YOUTUBE_LINK_PREFIX = "https://www.youtube.com/watch?v="
+    FFMPEG_LOCATION = "/usr/bin/ffmpeg"
 
     def __init__(self):
         logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(message)s", datefmt="%d/%m/%Y %H:%M:%S", handlers=[logging.StreamHandler(sys.stdout)])
@@ -34,27 +1090,71 @@ class DataHandler:
         self.logger.warning(f"{app_name_text} Version: {release_version}\n")
         self.logger.warning(f"{'*' * 50}")
 
-        self.config_folder = "config"
-        self.download_folder = "downloads"
+        # Absolute paths keep background threads working in the right folders if the working directory changes later
+        self.config_folder = os.path.abspath("config")
+        self.download_folder = os.path.abspath("downloads")
         self.media_server_addresses = "Plex: http://192.168.1.2:32400, Jellyfin: http://192.168.1.2:8096"
         self.media_server_tokens = "Plex: abc, Jellyfin: xyz"
         self.media_server_library_name = "Music"
         self.spotify_client_id = ""
         self.spotify_client_secret = ""
         self.thread_limit = int(os.environ.get("thread_limit", 1))
-        self.media_server_scan_req_flag = False
+        self.search_thread_limit = int(os.environ.get("search_thread_limit", self.thread_limit))
+        self.download_thread_limit = int(os.environ.get("download_thread_limit", self.thread_limit))
+        self.post_process_thread_limit = int(os.environ.get("post_process_thread_limit", os.cpu_count() or 1))
+        self.audio_format = os.environ.get("audio_format", "mp3").lower()
+        self.search_result_limit = int(os.environ.get("search_result_limit", 5))
+        self.progress_interval = float(os.environ.get("progress_interval", 1))
+        self.sync_max_retries = int(os.environ.get("sync_max_retries", 3))
+        self.spotify_page_concurrency = max(int(os.environ.get("spotify_page_concurrency", 4)), 1)
+        self.max_search_thread_limit = int(os.environ.get("max_search_thread_limit", self.search_thread_limit * 4))
+        self.max_download_thread_limit = int(os.environ.get("max_download_thread_limit", self.download_thread_limit * 4))
+        try:
+            self.bandwidth_limiter = BandwidthLimiter(os.environ.get("download_bandwidth_limit", "0"), os.environ.get("download_bandwidth_schedule", ""))
+
+        except Exception as e:
+            self.logger.error(f"Error Parsing Bandwidth Limit, downloads will not be limited: {str(e)}")
+            self.bandwidth_limiter = BandwidthLimiter("0")
+        self.bandwidth_state = threading.local()
+        self.rate_limiters = {
+            "spotify": TokenBucket(float(os.environ.get("spotify_rate_limit", 0))),
+            "ytmusic": TokenBucket(float(os.environ.get("ytmusic_rate_limit", 0))),
+            "youtube": TokenBucket(float(os.environ.get("youtube_rate_limit", 0))),
+        }
+        self.media_server_library_path = os.environ.get("media_server_library_path", "").rstrip("/\\")
+        self.media_server_scan_delay = float(os.environ.get("media_server_scan_delay", 60))
+        self.changed_folders = set()
         self.crop_album_art = os.getenv("crop_album_art", "false").lower()
+        self.search_cache_hit_ttl = float(os.environ.get("search_cache_hit_ttl_days", 30)) * 86400
+        self.search_cache_miss_ttl = float(os.environ.get("search_cache_miss_ttl_days", 3)) * 86400
+        self.search_cache_max_entries = int(os.environ.get("search_cache_max_entries", 100000))
+        self.artwork_cache_ttl = float(os.environ.get("artwork_cache_ttl_days", 90)) * 86400
+        self.sync_workers = int(os.environ.get("sync_workers", 0))
+        self.track_store_mode = os.environ.get("track_store_mode", "hardlink").lower()
+        self.sync_trace = os.getenv("sync_trace", "false").lower()
+        self.sync_trace_max_files = int(os.environ.get("sync_trace_max_files", 10))
 
         if not os.path.exists(self.config_folder):
             os.makedirs(self.config_folder)
         if not os.path.exists(self.download_folder):
             os.makedirs(self.download_folder)
 
+        # Partial downloads are kept next to the download folder so they can be cleaned up after a restart
+        self.temp_folder = os.path.join(self.download_folder, ".syncify_temp")
+        os.makedirs(self.temp_folder, exist_ok=True)
+        self.trace_folder = os.path.join(self.config_folder, "traces")
+        self.trace = None
+        self.media_scan_traces = []
+
         self.sync_start_times = [0]
         self.settings_config_file = os.path.join(self.config_folder, "settings_config.json")
 
         self.sync_list = []
         self.sync_list_config_file = os.path.join(self.config_folder, "sync_list.json")
+        self.sync_list_version = 0
+        self.sync_list_lock = threading.Lock()
+        self.config_writer = ConfigWriter(self.logger)
+        atexit.register(self.config_writer.flush)
 
         if os.path.exists(self.settings_config_file):
             self.load_from_file()
@@ -62,13 +1162,175 @@ class DataHandler:
         if os.path.exists(self.sync_list_config_file):
             self.load_sync_list_from_file()
 
+        self.client_pool = ClientPool()
+        self.track_matcher = TrackMatcher()
+        self.concurrency_limiters = {
+            "search": AdaptiveLimiter(self.search_thread_limit, self.max_search_thread_limit),
+            # Download times depend on the song length, so only throttling errors reduce the download limit
+            "download": AdaptiveLimiter(self.download_thread_limit, self.max_download_thread_limit, slow_factor=0),
+        }
+        self.progress_tracker = ProgressTracker(self.emit_progress, self.progress_interval, self.get_concurrency_state)
+        self.active_queues = {}
+        self.metrics = Metrics()
+        self.metrics.describe("syncify_sync_in_progress", "gauge", "Whether a sync is currently running.")
+        self.metrics.describe("syncify_sync_seconds", "histogram", "Duration of complete sync runs.", buckets=(60, 300, 900, 1800, 3600, 7200, 14400, 28800, 57600))
+        self.metrics.describe("syncify_playlist_extraction_seconds", "histogram", "Time taken to extract the track list of a playlist.")
+        self.metrics.describe("syncify_playlist_extraction_last_seconds", "gauge", "Time taken by the last track list extraction of each playlist.")
+        self.metrics.describe("syncify_playlists_total", "counter", "Playlists processed by sync runs by result.")
+        self.metrics.describe("syncify_search_seconds", "histogram", "Latency of YouTube Music searches for a single song.")
+        self.metrics.describe("syncify_search_results_total", "counter", "YouTube Music search results by match outcome.")
+        self.metrics.describe("syncify_search_cache_total", "counter", "Search cache lookups by result.")
+        self.metrics.describe("syncify_artwork_cache_total", "counter", "Album art cache lookups by result.")
+        self.metrics.describe("syncify_downloads_total", "counter", "Song downloads by result.")
+        self.metrics.describe("syncify_download_seconds", "histogram", "Time taken to download a single song.")
+        self.metrics.describe("syncify_download_bytes_total", "counter", "Bytes downloaded by yt_dlp.")
+        self.metrics.describe("syncify_download_speed_bytes_per_second", "gauge", "Average speed of the last finished download.")
+        self.metrics.describe("syncify_post_process_seconds", "histogram", "Time taken to transcode and tag a single song.")
+        self.metrics.describe("syncify_post_process_total", "counter", "Post-processed songs by result.")
+        self.metrics.describe("syncify_queue_depth", "gauge", "Number of items waiting in each sync queue.")
+        self.metrics.describe("syncify_concurrency_limit", "gauge", "Current adaptive concurrency limit of each stage.")
+        self.metrics.describe("syncify_backoff_seconds", "gauge", "Remaining throttling backoff of each stage.")
+        self.metrics.describe("syncify_bandwidth_limit_bytes_per_second", "gauge", "Current download bandwidth limit, 0 means unlimited.")
+        self.metrics.describe("syncify_media_server_scans_total", "counter", "Media server scan requests by server and result.")
+        self.search_cache = SearchCache(os.path.join(self.config_folder, "search_cache.db"), self.search_cache_hit_ttl, self.search_cache_miss_ttl, self.search_cache_max_entries)
+
+        self.artwork_cache = ArtworkCache(os.path.join(self.config_folder, "artwork_cache"), self.FFMPEG_LOCATION, self.crop_album_art == "true", self.artwork_cache_ttl)
+        self.library_index = LibraryIndex(os.path.join(self.config_folder, "library_index.db"), self.string_cleaner)
+        self.media_scan_debouncer = MediaScanDebouncer(self.run_media_scan, self.media_server_scan_delay, self.media_server_scan_delay * 10)
+        self.sync_journal = SyncJournal(os.path.join(self.config_folder, "sync_journal.db"), self.sync_max_retries)
+        self.track_store = TrackStore(os.path.join(self.config_folder, "track_store.db"))
+        self.inflight_tracks = {}
+        self.playlist_file_lock = threading.Lock()
+        self.job_queue = JobQueue(os.path.join(self.config_folder, "sync_jobs.db"))
+        self.worker_metrics = {}
+
         full_cookies_path = os.path.join(self.config_folder, "cookies.txt")
         self.cookies_path = full_cookies_path if os.path.exists(full_cookies_path) else None
-        self.sync_in_progress_flag = False
+        self.sync_state_lock = threading.Lock()
+        self.sync_scheduler = SyncScheduler(self.run_scheduled_sync, self.logger)
+
+    def start_web(self):
+        # The engine is started in the background so the web server can answer requests straight away
+        engine_thread = threading.Thread(target=self.start_engine, daemon=True)
+        engine_thread.start()
+
+    def start_engine(self):
+        try:
+            self.refresh_schedule()
+            self.sync_scheduler.start()
+
+            relay_thread = threading.Thread(target=self.relay_events, daemon=True)
+            relay_thread.start()
 
-        task_thread = threading.Thread(target=self.schedule_checker)
-        task_thread.daemon = True
-        task_thread.start()
+            if self.sync_workers == 0:
+                self.logger.warning("Running the sync worker inside the web server.")
+                shutil.rmtree(self.temp_folder, ignore_errors=True)
+                worker_thread = threading.Thread(target=self.run_worker, args=(False,), daemon=True)
+                worker_thread.start()
+
+        except Exception as e:
+            self.logger.error(f"Error Starting Sync Engine: {str(e)}")
+
+    def run_worker(self, publish_metrics=True):
+        worker_id = f"{socket.gethostname()}-{os.getpid()}-{threading.get_ident()}"
+        os.makedirs(self.temp_folder, exist_ok=True)
+        self.logger.warning(f"Sync worker started: {worker_id}")
+        # Only the job this worker is running gets heartbeats, any other job it claimed becomes stale and is reclaimed
+        current_job = {"job_id": None}
+
+        def send_heartbeats():
+            while True:
+                time.sleep(self.job_queue.stale_after / 4)
+                try:
+                    job_id = current_job["job_id"]
+                    if job_id is not None:
+                        self.job_queue.heartbeat(job_id, worker_id)
+                    if publish_metrics:
+                        # Metrics of a separate worker process only reach /metrics through the web server
+                        self.update_queue_metrics()
+                        self.publish_event("metrics", {"worker": worker_id, "metrics": self.metrics.snapshot()})
+
+                except Exception as e:
+                    self.logger.error(f"Error Sending Worker Heartbeat: {str(e)}")
+
+        heartbeat_thread = threading.Thread(target=send_heartbeats, daemon=True)
+        heartbeat_thread.start()
+
+        while True:
+            try:
+                job = self.job_queue.claim(worker_id)
+                if job is None:
+                    time.sleep(1)
+                    continue
+
+                self.logger.warning(f"Sync worker {worker_id} running job {job['job_id']}")
+                current_job["job_id"] = job["job_id"]
+                try:
+                    if os.path.exists(self.settings_config_file):
+                        self.load_from_file()
+                    self.master_queue(force=job["payload"]["force"], playlists=job["payload"]["playlists"], run_id=job["job_id"])
+                    self.complete_job(job["job_id"])
+
+                finally:
+                    current_job["job_id"] = None
+
+            except Exception as e:
+                self.logger.error(f"Error in Sync Worker: {str(e)}")
+                time.sleep(1)
+
+    def complete_job(self, job_id, attempts=5):
+        for attempt in range(attempts):
+            try:
+                self.job_queue.complete(job_id)
+                return
+
+            except Exception as e:
+                self.logger.error(f"Error Completing Sync Job {job_id}: {str(e)}")
+                time.sleep(2**attempt)
+        # Without heartbeats the job turns stale, so another worker picks it up instead of it staying active forever
+        self.logger.error(f"Giving up on completing Sync Job {job_id}, it will be reclaimed")
+
+    def submit_sync(self, playlists, force=False):
+        # Workers read the settings file when they pick up a job
+        self.config_writer.flush()
+        job_id = self.job_queue.submit("sync", {"force": force, "playlists": playlists})
+        self.logger.warning(f"Sync job {job_id} queued for: {', '.join(playlist['Name'] for playlist in playlists)}")
+
+    def publish_event(self, name, payload):
+        try:
+            self.job_queue.publish(name, payload)
+
+        except Exception as e:
+            self.logger.error(f"Error Publishing {name} Event: {str(e)}")
+
+    def relay_events(self):
+        while True:
+            try:
+                for name, payload in self.job_queue.consume_events():
+                    if name == "playlist_update":
+                        self.apply_playlist_results(payload["playlists"])
+                    elif name == "metrics":
+                        self.worker_metrics[payload["worker"]] = (time.monotonic(), payload["metrics"])
+                    else:
+                        socketio.emit(name, payload)
+
+            except Exception as e:
+                self.logger.error(f"Error Relaying Sync Events: {str(e)}")
+
+            time.sleep(0.5)
+
+    def apply_playlist_results(self, results):
+        changed = []
+        for result in results:
+            for playlist in self.sync_list:
+                if playlist["Name"] == result["Name"]:
+                    playlist.update(result)
+                    changed.append(playlist)
+                    break
+
+        if changed:
+            self.save_sync_list_to_file()
+            self.publish_playlist_changes(changed=changed)
 
     def load_from_file(self):
         try:
@@ -85,23 +1347,17 @@ class DataHandler:
             self.logger.error(f"Error Loading Config: {str(e)}")
 
     def save_to_file(self):
-        try:
-            with open(self.settings_config_file, "w") as json_file:
-                json.dump(
-                    {
-                        "sync_start_times": self.sync_start_times,
-                        "media_server_addresses": self.media_server_addresses,
-                        "media_server_tokens": self.media_server_tokens,
-                        "media_server_library_name": self.media_server_library_name,
-                        "spotify_client_id": self.spotify_client_id,
-                        "spotify_client_secret": self.spotify_client_secret,
-                    },
-                    json_file,
-                    indent=4,
-                )
-
-        except Exception as e:
-            self.logger.error(f"Error Saving Config: {str(e)}")
+        self.config_writer.write(
+            self.settings_config_file,
+            lambda: {
+                "sync_start_times": self.sync_start_times,
+                "media_server_addresses": self.media_server_addresses,
+                "media_server_tokens": self.media_server_tokens,
+                "media_server_library_name": self.media_server_library_name,
+                "spotify_client_id": self.spotify_client_id,
+                "spotify_client_secret": self.spotify_client_secret,
+            },
+        )
 
     def load_sync_list_from_file(self):
         try:
@@ -112,252 +1368,585 @@ class DataHandler:
             self.logger.error(f"Error Loading Playlists: {str(e)}")
 
     def save_sync_list_to_file(self):
-        try:
-            with open(self.sync_list_config_file, "w") as json_file:
-                json.dump(self.sync_list, json_file, indent=4)
+        self.config_writer.write(self.sync_list_config_file, lambda: self.sync_list)
+
+    def publish_playlist_changes(self, changed=(), removed=(), reordered=False, skip_sid=None):
+        with self.sync_list_lock:
+            self.sync_list_version += 1
+            delta = {"version": self.sync_list_version, "base_version": self.sync_list_version - 1, "changed": list(changed), "removed": list(removed)}
+            if reordered:
+                delta["order"] = [playlist["Name"] for playlist in self.sync_list]
+            socketio.emit("playlist_delta", delta, skip_sid=skip_sid)
+            return self.sync_list_version
+
+    def replace_sync_list(self, sync_list, skip_sid=None):
+        previous_playlists = {playlist["Name"]: playlist for playlist in self.sync_list}
+        changed = [playlist for playlist in sync_list if previous_playlists.get(playlist["Name"]) != playlist]
+        current_names = {playlist["Name"] for playlist in sync_list}
+        removed = [name for name in previous_playlists if name not in current_names]
+        reordered = list(previous_playlists) != [playlist["Name"] for playlist in sync_list]
+        self.sync_list = sync_list
+        self.save_sync_list_to_file()
+        self.refresh_schedule()
+        return self.publish_playlist_changes(changed, removed, reordered, skip_sid)
+
+    def get_playlist_schedule(self, playlist):
+        schedule_spec = (playlist.get("Schedule") or "").strip()
+        if schedule_spec:
+            try:
+                return SyncSchedule(schedule_spec)
 
-        except Exception as e:
-            self.logger.error(f"Error Saving Playlists: {str(e)}")
+            except Exception as e:
+                self.logger.error(f"Invalid Schedule for {playlist['Name']}, using the default Sync Schedule: {str(e)}")
+
+        if not self.sync_start_times:
+            return None
+        return SyncSchedule(f"0 {','.join(str(hour) for hour in self.sync_start_times)} * * *")
+
+    def refresh_schedule(self):
+        jobs = {}
+        for playlist in self.sync_list:
+            schedule = self.get_playlist_schedule(playlist)
+            if schedule is None:
+                continue
+            try:
+                last_run = datetime.datetime.strptime(playlist.get("Last_Synced", ""), "%d-%m-%y %H:%M:%S")
 
-    def schedule_checker(self):
-        self.logger.warning("Starting periodic checks every 10 minutes to monitor sync start times.")
-        self.logger.warning(f"Current scheduled hours to start sync (in 24-hour format): {self.sync_start_times}")
+            except ValueError:
+                last_run = None
+            jobs[playlist["Name"]] = (schedule, last_run)
 
-        while True:
-            current_time = datetime.datetime.now().time()
-            within_sync_window = any(datetime.time(t, 0, 0) <= current_time <= datetime.time(t, 59, 59) for t in self.sync_start_times)
+        self.sync_scheduler.update(jobs)
+        next_due = self.sync_scheduler.next_due()
+        if next_due:
+            self.logger.warning(f"Next scheduled sync: {next_due[1]} at {next_due[0].strftime('%d-%m-%y %H:%M')}")
+        else:
+            self.logger.warning("No scheduled syncs.")
 
-            if within_sync_window and self.sync_in_progress_flag:
-                self.logger.warning(f"In Sync Window but sync already in progress.")
-                self.logger.warning(f"Checking again in 10 minutes.")
-                time.sleep(600)
+    def run_scheduled_sync(self, playlist_names):
+        try:
+            queued_names = {playlist["Name"] for job in self.job_queue.active_jobs() for playlist in job["payload"]["playlists"]}
+            for playlist_name in sorted(queued_names.intersection(playlist_names)):
+                self.logger.warning(f"Scheduled sync due but already queued or running: {playlist_name}")
 
-            elif within_sync_window and not self.sync_in_progress_flag:
-                self.logger.warning(f"Time to Start Sync - as in a time window {self.sync_start_times}")
-                self.master_queue()
-                self.logger.warning("Big sleep for 1 Hour - Sync Done")
-                time.sleep(3600)
-                self.logger.warning(f"Checking every 10 minutes as not in sync time window {self.sync_start_times}")
+            playlists = [playlist for playlist in self.sync_list if playlist["Name"] in playlist_names and playlist["Name"] not in queued_names]
+            if playlists:
+                self.logger.warning(f"Time to Start Sync for: {', '.join(playlist['Name'] for playlist in playlists)}")
+                self.submit_sync(playlists)
+            return True
 
-            else:
-                time.sleep(600)
+        except Exception as e:
+            self.logger.error(f"Error Queueing Scheduled Sync: {str(e)}")
+            return False
 
     def spotify_extractor(self, link):
-        sp = spotipy.Spotify(auth_manager=SpotifyClientCredentials(client_id=self.spotify_client_id, client_secret=self.spotify_client_secret))
-        sp_anon = spotipy.Spotify(auth_manager=SpotifyAnon())
-
-        track_list = []
+        sp = self.client_pool.spotify(self.spotify_client_id, self.spotify_client_secret)
 
         if "album" in link:
+            self.rate_limiters["spotify"].acquire()
             album_info = sp.album(link)
             album_name = album_info["name"]
-            album = sp.album_tracks(link)
-            for item in album["items"]:
-                try:
-                    track_title = item["name"]
-                    artists = [artist["name"] for artist in item["artists"]]
-                    artists_str = ", ".join(artists)
-                    track_list.append({"Artist": artists_str, "Title": track_title, "Status": "Queued", "Folder": album_name})
-
-                except Exception as e:
-                    self.logger.error(f"Error Parsing Item in Album: {str(item)} - {str(e)}")
+            album_tracks = album_info["tracks"]
+            pages = self.fetch_spotify_pages(self.fetch_album_page, link, album_tracks["total"], album_tracks["limit"] or 50, first_page=album_tracks)
+            for page in pages:
+                for item in page["items"]:
+                    try:
+                        track_title = item["name"]
+                        artists = [artist["name"] for artist in item["artists"]]
+                        artists_str = ", ".join(artists)
+                        duration = item["duration_ms"] / 1000 if item.get("duration_ms") else None
+                        yield {"Artist": artists_str, "Title": track_title, "Status": "Queued", "Folder": album_name, "ISRC": None, "Duration": duration}
+
+                    except Exception as e:
+                        self.logger.error(f"Error Parsing Item in Album: {str(item)} - {str(e)}")
 
         else:
             try:
-                playlist = sp.playlist(link)
+                self.rate_limiters["spotify"].acquire()
+                playlist = sp.playlist(link, fields="name,tracks(total)")
 
             except Exception as e:
                 self.logger.error(f"Error using authenticated account to get playlist: {str(e)}.")
                 self.logger.info(f"Attempting to use anonymous authentication...")
-                playlist = sp_anon.playlist(link)
+                self.rate_limiters["spotify"].acquire()
+                playlist = self.client_pool.spotify_anonymous().playlist(link, fields="name,tracks(total)")
 
             playlist_name = playlist["name"]
             number_of_tracks = playlist["tracks"]["total"]
-            fields = "items(track(name,artists(name)),added_at)"
+            for page in self.fetch_spotify_pages(self.fetch_playlist_page, link, number_of_tracks, 100):
+                for item in page["items"]:
+                    try:
+                        track = item["track"]
+                        track_title = track["name"]
+                        artists = [artist["name"] for artist in track["artists"]]
+                        artists_str = ", ".join(artists)
+                        isrc = (track.get("external_ids") or {}).get("isrc")
+                        duration = track["duration_ms"] / 1000 if track.get("duration_ms") else None
+                        yield {"Artist": artists_str, "Title": track_title, "Status": "Queued", "Folder": playlist_name, "ISRC": isrc, "Duration": duration}
+
+                    except Exception as e:
+                        self.logger.error(f"Error Parsing Item in Playlist: {str(item)} - {str(e)}")
+
+    def fetch_spotify_pages(self, fetch_page, link, total, limit, first_page=None):
+        offsets = iter(range(limit if first_page else 0, total, limit))
+        if first_page:
+            yield first_page
+
+        # Fetch a bounded window of pages concurrently but hand them out in playlist order
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.spotify_page_concurrency) as executor:
+            pending_pages = collections.deque(executor.submit(fetch_page, link, offset, limit) for offset in itertools.islice(offsets, self.spotify_page_concurrency))
+            while pending_pages:
+                page = pending_pages.popleft().result()
+                for offset in itertools.islice(offsets, 1):
+                    pending_pages.append(executor.submit(fetch_page, link, offset, limit))
+                yield page
+
+    def fetch_playlist_page(self, link, offset, limit):
+        fields = "items(track(name,artists(name),external_ids(isrc),duration_ms))"
+        try:
+            self.rate_limiters["spotify"].acquire()
+            return self.client_pool.spotify(self.spotify_client_id, self.spotify_client_secret).playlist_items(link, fields=fields, limit=limit, offset=offset)
 
-            offset = 0
-            limit = 100
-            all_items = []
-            while offset < number_of_tracks:
-                try:
-                    results = sp.playlist_items(link, fields=fields, limit=limit, offset=offset)
+        except Exception as e:
+            self.logger.error(f"Error using authenticated account to get playlist: {str(e)}.")
+            self.logger.info(f"Attempting to use anonymous authentication...")
+            self.rate_limiters["spotify"].acquire()
+            return self.client_pool.spotify_anonymous().playlist_items(link, fields=fields, limit=limit, offset=offset)
 
-                except Exception as e:
-                    self.logger.error(f"Error using authenticated account to get playlist: {str(e)}.")
-                    self.logger.info(f"Attempting to use anonymous authentication...")
-                    results = sp_anon.playlist_items(link, fields=fields, limit=limit, offset=offset)
+    def fetch_album_page(self, link, offset, limit):
+        self.rate_limiters["spotify"].acquire()
+        return self.client_pool.spotify(self.spotify_client_id, self.spotify_client_secret).album_tracks(link, limit=limit, offset=offset)
 
-                all_items.extend(results["items"])
-                offset += limit
+    def get_playlist_snapshot(self, link, youtube_playlist=None):
+        try:
+            if "youtube" in link:
+                # YouTube playlists have no snapshot id, so the already fetched track list is hashed instead
+                if youtube_playlist is None:
+                    return None
+                video_ids = "\n".join(str(track.get("videoId")) for track in youtube_playlist["tracks"])
+                return "youtube:" + hashlib.sha1(video_ids.encode("utf-8")).hexdigest()
+
+            sp = self.client_pool.spotify(self.spotify_client_id, self.spotify_client_secret)
+            if "album" in link:
+                self.rate_limiters["spotify"].acquire()
+                album_info = sp.album(link)
+                return f'album:{album_info["id"]}:{album_info["tracks"]["total"]}'
 
-            all_items_sorted = sorted(all_items, key=lambda x: x["added_at"], reverse=False)
-            for item in all_items_sorted:
-                try:
-                    track = item["track"]
-                    track_title = track["name"]
-                    artists = [artist["name"] for artist in track["artists"]]
-                    artists_str = ", ".join(artists)
-                    track_list.append({"Artist": artists_str, "Title": track_title, "Status": "Queued", "Folder": playlist_name})
+            try:
+                self.rate_limiters["spotify"].acquire()
+                playlist = sp.playlist(link, fields="snapshot_id")
 
-                except Exception as e:
-                    self.logger.error(f"Error Parsing Item in Playlist: {str(item)} - {str(e)}")
+            except Exception as e:
+                self.logger.error(f"Error using authenticated account to get playlist snapshot: {str(e)}.")
+                self.logger.info(f"Attempting to use anonymous authentication...")
+                self.rate_limiters["spotify"].acquire()
+                playlist = self.client_pool.spotify_anonymous().playlist(link, fields="snapshot_id")
 
-        return track_list
+            return "spotify:" + playlist["snapshot_id"]
 
-    def youtube_extractor(self, link):
-        self.ytmusic = YTMusic()
-        track_list = []
+        except Exception as e:
+            self.logger.error(f"Error Getting Playlist Snapshot: {str(e)}")
+            return None
+
+    def fetch_youtube_playlist(self, link):
         playlist_id = parse_qs(urlparse(link).query).get("list", [None])[0]
-        if playlist_id:
-            playlist = self.ytmusic.get_playlist(playlist_id)
+        if not playlist_id:
+            self.logger.error("Unsupported youtube playlist url! It must have a list=<playlist_id> query params.")
+            return None
+        self.rate_limiters["ytmusic"].acquire()
+        return self.client_pool.ytmusic().get_playlist(playlist_id)
+
+    def youtube_extractor(self, playlist):
+        track_list = []
+        if playlist:
             playlist_name = playlist["title"]
 
             for track in playlist["tracks"]:
                 track_title = track["title"]
                 artist_str = ", ".join([a["name"] for a in track["artists"]])
                 track_list.append({"Artist": artist_str, "Title": track_title, "Status": "Queued", "Folder": playlist_name, "VideoID": track["videoId"]})
-        else:
-            self.logger.error("Unsupported youtube playlist url! It must have a list=<playlist_id> query params.")
 
         return track_list
 
-    def find_youtube_link(self, artist, title):
-        try:
-            first_result = None
-
-            self.ytmusic = YTMusic()
-            search_results = self.ytmusic.search(query=f"{artist} - {title}", filter="songs", limit=5)
-
+    def find_youtube_link(self, artist, title, isrc=None, duration=None):
+        with self.trace_span("find_youtube_link", "search", artist=artist, title=title) as span_args:
             cleaned_artist = self.string_cleaner(artist).lower()
             cleaned_title = self.string_cleaner(title).lower()
-            for item in search_results:
-                cleaned_youtube_title = self.string_cleaner(item["title"]).lower()
-                if cleaned_title in cleaned_youtube_title:
-                    first_result = self.YOUTUBE_LINK_PREFIX + item["videoId"]
-                    break
-            else:
-                # Try again but check for a partial match
-                for item in search_results:
-                    cleaned_youtube_title = self.string_cleaner(item["title"]).lower()
-                    cleaned_youtube_artists = ", ".join(self.string_cleaner(x["name"]).lower() for x in item["artists"])
+            cached, cached_link = self.search_cache.get(cleaned_artist, cleaned_title)
+            span_args["cached"] = cached
+            if cached:
+                self.metrics.inc("syncify_search_cache_total", result="hit")
+                return cached_link
+
+            self.metrics.inc("syncify_search_cache_total", result="miss")
+            start_time = time.monotonic()
+            try:
+                first_result = self.search_youtube_link(artist, title, isrc, duration)
 
-                    title_ratio = 100 if all(word in cleaned_title for word in cleaned_youtube_title.split()) else fuzz.ratio(cleaned_title, cleaned_youtube_title)
-                    artist_ratio = 100 if cleaned_artist in cleaned_youtube_artists else fuzz.ratio(cleaned_artist, cleaned_youtube_artists)
+            except Exception as e:
+                self.logger.error(f"Error Finding YouTube Link: {str(e)}")
+                self.metrics.inc("syncify_search_results_total", outcome="error")
+                span_args["error"] = str(e)
+                return None
 
-                    if title_ratio >= 90 and artist_ratio >= 90:
-                        first_result = self.YOUTUBE_LINK_PREFIX + item["videoId"]
-                        break
-                else:
-                    # Default to first result if Top result is not found
-                    first_result = self.YOUTUBE_LINK_PREFIX + search_results[0]["videoId"]
-
-                    # Search for Top result specifically
-                    top_search_results = self.ytmusic.search(query=cleaned_title, limit=5)
-                    cleaned_youtube_title = self.string_cleaner(top_search_results[0]["title"]).lower()
-                    if "Top result" in top_search_results[0]["category"] and top_search_results[0]["resultType"] == "song" or top_search_results[0]["resultType"] == "video":
-                        cleaned_youtube_artists = ", ".join(self.string_cleaner(x["name"]).lower() for x in top_search_results[0]["artists"])
-                        title_ratio = 100 if cleaned_title in cleaned_youtube_title else fuzz.ratio(cleaned_title, cleaned_youtube_title)
-                        artist_ratio = 100 if cleaned_artist in cleaned_youtube_artists else fuzz.ratio(cleaned_artist, cleaned_youtube_artists)
-                        if (title_ratio >= 90 and artist_ratio >= 40) or (title_ratio >= 40 and artist_ratio >= 90):
-                            first_result = self.YOUTUBE_LINK_PREFIX + top_search_results[0]["videoId"]
+            finally:
+                self.metrics.observe("syncify_search_seconds", time.monotonic() - start_time)
 
-        except Exception as e:
-            self.logger.error(f"Error Finding YouTube Link: {str(e)}")
+            self.search_cache.put(cleaned_artist, cleaned_title, first_result)
+            span_args["link"] = first_result
+            return first_result
 
-        finally:
+    def search_ytmusic(self, ytmusic, search_type, **search_args):
+        with self.trace_span("ytmusic.search", "search", type=search_type, query=search_args["query"]) as span_args:
+            self.rate_limiters["ytmusic"].acquire()
+            search_results = self.concurrency_limiters["search"].call(ytmusic.search, **search_args)
+            span_args["results"] = len(search_results or [])
+            return search_results
+
+    def search_youtube_link(self, artist, title, isrc=None, duration=None):
+        first_result = None
+
+        ytmusic = self.client_pool.ytmusic()
+        if isrc:
+            # YouTube Music indexes songs by ISRC, so a single lookup usually finds the exact recording
+            isrc_results = self.search_ytmusic(ytmusic, "isrc", query=isrc, filter="songs", limit=1)
+            if isrc_results and isrc_results[0].get("videoId"):
+                isrc_result = isrc_results[0]
+                if duration:
+                    isrc_match = self.track_matcher.matches_duration(isrc_result, duration)
+                else:
+                    isrc_match = self.track_matcher.rank(title, artist, [isrc_result])[0]["outcome"] is not None
+                if isrc_match:
+                    self.metrics.inc("syncify_search_results_total", outcome="isrc")
+                    return self.YOUTUBE_LINK_PREFIX + isrc_result["videoId"]
+
+        search_results = self.search_ytmusic(ytmusic, "songs", query=f"{artist} - {title}", filter="songs", limit=self.search_result_limit)
+        if not search_results:
+            self.metrics.inc("syncify_search_results_total", outcome="none")
             return first_result
 
-    def get_download_list(self, playlist):
+        ranked_results = self.track_matcher.rank(title, artist, search_results)
+        best_result = ranked_results[0]
+        if duration:
+            # Prefer a matching result of the right length, e.g. the album version over a radio edit
+            best_result = next((result for result in ranked_results if result["outcome"] and self.track_matcher.matches_duration(result["item"], duration)), best_result)
+        if best_result["outcome"]:
+            first_result = self.YOUTUBE_LINK_PREFIX + best_result["videoId"]
+            match_outcome = best_result["outcome"]
+        else:
+            # Default to first result if Top result is not found
+            first_result = self.YOUTUBE_LINK_PREFIX + search_results[0]["videoId"]
+            match_outcome = "first_result"
+
+            # Search for Top result specifically
+            try:
+                top_search_results = self.search_ytmusic(ytmusic, "top_result", query=self.track_matcher.normalize(title), limit=5)
+                top_result = top_search_results[0]
+                if "Top result" in top_result["category"] and top_result["resultType"] == "song" or top_result["resultType"] == "video":
+                    if self.track_matcher.match_top_result(title, artist, top_result):
+                        first_result = self.YOUTUBE_LINK_PREFIX + top_result["videoId"]
+                        match_outcome = "top_result"
+
+            except Exception as e:
+                self.logger.error(f"Error Checking Top Result: {str(e)}")
+
+        self.metrics.inc("syncify_search_results_total", outcome=match_outcome)
+        return first_result
+
+    def get_download_list(self, playlist, search_queue, download_queue, sync_state):
         try:
-            song_list_to_download = []
             playlist_name = playlist["Name"]
             playlist_link = playlist["Link"]
-            if "youtube" in playlist_link:
-                playlist_tracks = self.youtube_extractor(playlist_link)
-            else:
-                playlist_tracks = self.spotify_extractor(playlist_link)
-
             playlist_folder = playlist_name
             playlist_folder_full_path = os.path.join(self.download_folder, playlist_folder)
 
-            if not os.path.exists(playlist_folder_full_path):
-                os.makedirs(playlist_folder_full_path)
-
-            raw_directory_list = os.listdir(playlist_folder_full_path)
-            directory_list = self.string_cleaner(raw_directory_list)
-
-            with concurrent.futures.ThreadPoolExecutor(max_workers=self.thread_limit) as executor:
-                futures = []
-                for song in playlist_tracks:
-                    full_file_name = f'{song["Title"]} - {song["Artist"]}'
-                    cleaned_full_file_name = self.string_cleaner(full_file_name)
-                    if cleaned_full_file_name not in directory_list:
-                        song_artist = song["Artist"]
-                        song_title = song["Title"]
-                        if song.get("VideoID"):
-                            song_actual_link = self.YOUTUBE_LINK_PREFIX + song["VideoID"]
-                            song_list_to_download.append({"title": cleaned_full_file_name, "link": song_actual_link, "playlist_folder": playlist_folder})
-                            self.logger.warning(f"Added Song to Download List: {cleaned_full_file_name} : {song_actual_link}")
-                        else:
-                            future = executor.submit(self.find_youtube_link, song_artist, song_title)
-                            futures.append((future, cleaned_full_file_name))
-                            self.logger.warning(f"Searching for Song: {cleaned_full_file_name}")
-                    else:
-                        self.logger.warning(f"File Already in folder: {cleaned_full_file_name}")
+            sync_state["snapshot_id"], journal_tracks = self.sync_journal.get_playlist(sync_state["run_id"], playlist_name)
+            if journal_tracks is not None:
+                self.logger.warning(f"Resuming Playlist from Sync Journal: {playlist_name}")
+                pending_tracks = []
+                for track in journal_tracks:
+                    if track["state"] == "done":
+                        continue
+                    if track["state"] == "unmatched":
+                        self.record_unmatched(sync_state)
+                        continue
+                    if track["state"] == "failed" and track["retries"] >= self.sync_max_retries:
+                        self.logger.warning(f"Giving up on Song after {track['retries']} attempts: {track['title']}")
+                        self.record_failure(sync_state)
+                        continue
+                    pending_tracks.append(track)
+
+                if not os.path.exists(playlist_folder_full_path):
+                    os.makedirs(playlist_folder_full_path)
 
-                for future, file_name in futures:
-                    song_actual_link = future.result()
-                    if song_actual_link:
-                        song_list_to_download.append({"title": file_name, "link": song_actual_link, "playlist_folder": playlist_folder})
-                        self.logger.warning(f"Added Song to Download List: {file_name} : {song_actual_link}")
+            else:
+                # The YouTube playlist is fetched once and used for both the snapshot and the track list
+                youtube_playlist = self.fetch_youtube_playlist(playlist_link) if "youtube" in playlist_link else None
+                sync_state["snapshot_id"] = self.get_playlist_snapshot(playlist_link, youtube_playlist)
+                if not sync_state["force"] and sync_state["snapshot_id"] and sync_state["snapshot_id"] == playlist.get("Snapshot_ID") and os.path.isdir(playlist_folder_full_path):
+                    self.logger.warning(f"Playlist unchanged since last sync, skipping: {playlist_name}")
+                    sync_state["skipped"] = True
+                    return
+
+                if not os.path.exists(playlist_folder_full_path):
+                    os.makedirs(playlist_folder_full_path)
+
+                directory_list = self.library_index.get_names(playlist_folder_full_path) | self.get_playlist_file_names(playlist_folder)
+
+                self.logger.warning(f"Looking for Playlist Songs on YouTube: {playlist_name}")
+                with self.trace_span("extraction", "playlist", playlist=playlist_name):
+                    extraction_start_time = time.monotonic()
+                    if "youtube" in playlist_link:
+                        playlist_tracks = self.youtube_extractor(youtube_playlist)
                     else:
-                        self.logger.error(f"No Link Found for: {file_name}")
+                        playlist_tracks = self.spotify_extractor(playlist_link)
+
+                    # Tracks are journaled and queued in batches so searching starts while later pages are still being fetched
+                    pending_tracks = []
+                    for song in playlist_tracks:
+                        full_file_name = f'{song["Title"]} - {song["Artist"]}'
+                        cleaned_full_file_name = self.string_cleaner(full_file_name)
+                        if cleaned_full_file_name in directory_list:
+                            self.logger.warning(f"File Already in folder: {cleaned_full_file_name}")
+                            continue
+
+                        link = self.YOUTUBE_LINK_PREFIX + song["VideoID"] if song.get("VideoID") else None
+                        pending_tracks.append({"title": cleaned_full_file_name, "artist": song["Artist"], "song_title": song["Title"], "isrc": song.get("ISRC"), "duration": song.get("Duration"), "link": link, "state": "resolved" if link else "queued", "retries": 0})
+                        if len(pending_tracks) >= 100:
+                            self.sync_journal.add_tracks(sync_state["run_id"], playlist_name, pending_tracks)
+                            self.dispatch_tracks(pending_tracks, playlist, sync_state, search_queue, download_queue)
+                            pending_tracks = []
+
+                    self.sync_journal.add_tracks(sync_state["run_id"], playlist_name, pending_tracks)
+                    self.sync_journal.add_playlist(sync_state["run_id"], playlist_name, sync_state["snapshot_id"])
+                    extraction_time = time.monotonic() - extraction_start_time
+                    self.metrics.observe("syncify_playlist_extraction_seconds", extraction_time)
+                    self.metrics.set("syncify_playlist_extraction_last_seconds", extraction_time, playlist=playlist_name)
+
+            self.dispatch_tracks(pending_tracks, playlist, sync_state, search_queue, download_queue)
 
         except Exception as e:
             self.logger.error(f"Error Getting Download List: {str(e)}")
+            self.record_failure(sync_state)
 
         finally:
-            return song_list_to_download
+            if self.trace:
+                with self.sync_state_lock:
+                    sync_state["trace_extracted"] = True
+                self.trace_playlist_finished(playlist["Name"], sync_state)
+
+    def dispatch_tracks(self, tracks, playlist, sync_state, search_queue, download_queue):
+        playlist_name = playlist["Name"]
+        playlist_priority = self.get_playlist_priority(playlist)
+        for track in tracks:
+            song_item = {"title": track["title"], "link": track["link"], "playlist_folder": playlist_name, "playlist": playlist, "sync_state": sync_state}
+            self.trace_track_started(song_item)
+            if song_item["link"]:
+                download_queue.put(playlist_name, song_item, playlist_priority)
+                self.logger.warning(f"Added Song to Download List: {song_item['title']} : {song_item['link']}")
+                continue
+
+            cached, song_item["link"] = self.search_cache.get(self.string_cleaner(track["artist"]).lower(), self.string_cleaner(track["song_title"]).lower())
+            if cached and song_item["link"]:
+                self.update_track_state(song_item, "resolved", song_item["link"])
+                download_queue.put(playlist_name, song_item, playlist_priority)
+                self.logger.warning(f"Added Song to Download List from Search Cache: {song_item['title']} : {song_item['link']}")
+            elif cached:
+                self.update_track_state(song_item, "unmatched")
+                self.record_unmatched(sync_state)
+                self.logger.warning(f"Skipping Song with no Link in Search Cache: {song_item['title']}")
+            else:
+                search_queue.put(playlist_name, (self.resolve_song, (track["artist"], track["song_title"], song_item, download_queue, track.get("isrc"), track.get("duration"))), playlist_priority)
+                self.logger.warning(f"Searching for Song: {song_item['title']}")
+
+    def resolve_song(self, artist, title, song_item, download_queue, isrc=None, duration=None):
+        song_item["link"] = self.find_youtube_link(artist, title, isrc, duration)
+        if song_item["link"]:
+            self.update_track_state(song_item, "resolved", song_item["link"])
+            download_queue.put(song_item["playlist"]["Name"], song_item, self.get_playlist_priority(song_item["playlist"]))
+            self.logger.warning(f"Added Song to Download List: {song_item['title']} : {song_item['link']}")
+            return
+
+        self.logger.error(f"No Link Found for: {song_item['title']}")
+        cached, _ = self.search_cache.get(self.string_cleaner(artist).lower(), self.string_cleaner(title).lower())
+        if cached:
+            self.update_track_state(song_item, "unmatched")
+            self.record_unmatched(song_item["sync_state"])
+        else:
+            self.update_track_state(song_item, "failed")
+            self.record_failure(song_item["sync_state"])
 
-    def download_queue(self, song_list, playlist):
+    def update_track_state(self, song, state, link=None):
         try:
-            with concurrent.futures.ThreadPoolExecutor(max_workers=self.thread_limit) as executor:
-                futures = []
-                for song in song_list:
-                    future = executor.submit(self.download_song, song, playlist)
-                    futures.append(future)
+            self.sync_journal.set_track_state(song["sync_state"]["run_id"], song["playlist"]["Name"], song["title"], state, link)
 
-                concurrent.futures.wait(futures)
+        except Exception as e:
+            self.logger.error(f"Error Updating Sync Journal: {str(e)}")
+
+        if state in ("done", "failed", "unmatched"):
+            self.trace_track_finished(song, state)
+
+    def trace_span(self, name, category, **args):
+        trace = self.trace
+        return trace.span(name, category, **args) if trace else contextlib.nullcontext(args)
+
+    def get_track_trace_id(self, song):
+        return f'{song["playlist"]["Name"]}/{song["title"]}'
+
+    def trace_track_started(self, song):
+        trace = self.trace
+        if not trace:
+            return
+        with self.sync_state_lock:
+            song["sync_state"]["trace_open_tracks"] += 1
+        trace.begin(song["title"], "track", self.get_track_trace_id(song), playlist=song["playlist"]["Name"])
+
+    def trace_track_finished(self, song, state):
+        trace = self.trace
+        if not trace:
+            return
+        trace.end(song["title"], "track", self.get_track_trace_id(song), state=state, link=song["link"])
+        with self.sync_state_lock:
+            song["sync_state"]["trace_open_tracks"] -= 1
+        self.trace_playlist_finished(song["playlist"]["Name"], song["sync_state"])
+
+    def trace_playlist_finished(self, playlist_name, sync_state, force=False):
+        # A playlist span ends once its track list is extracted and every queued track is finished
+        with self.sync_state_lock:
+            if sync_state["trace_finished"] or not force and (sync_state["trace_open_tracks"] or not sync_state["trace_extracted"]):
+                return
+            sync_state["trace_finished"] = True
+        self.trace.end(playlist_name, "playlist", playlist_name, skipped=sync_state["skipped"], failed_count=sync_state["failed_count"])
+
+    def start_trace(self):
+        try:
+            os.makedirs(self.trace_folder, exist_ok=True)
+            return SyncTrace(os.path.join(self.trace_folder, f"sync-{datetime.datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}.json"))
 
         except Exception as e:
-            self.logger.error(f"Error in Download Queue: {str(e)}")
+            self.logger.error(f"Error Starting Sync Trace: {str(e)}")
+            return None
 
-    def download_song(self, song, playlist):
-        temp_dir = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
-        self.media_server_scan_req_flag = True
+    def save_trace(self, trace):
+        try:
+            trace.save()
+            if self.sync_trace_max_files > 0:
+                trace_files = sorted(name for name in os.listdir(self.trace_folder) if name.startswith("sync-") and name.endswith(".json"))
+                for trace_file in trace_files[: -self.sync_trace_max_files]:
+                    os.remove(os.path.join(self.trace_folder, trace_file))
+            self.logger.warning(f"Sync Trace written to: {trace.path}")
 
-        link = song["link"]
-        title = song["title"]
-        playlist_folder = song["playlist_folder"]
-        sleep = playlist["Sleep"] if playlist["Sleep"] else 0
-        full_file_path = os.path.join(playlist_folder, title)
+        except Exception as e:
+            self.logger.error(f"Error Saving Sync Trace: {str(e)}")
+
+    def get_playlist_priority(self, playlist):
+        try:
+            return int(playlist.get("Priority") or 0)
+
+        except (TypeError, ValueError):
+            return 0
+
+    def start_workers(self, target, count, *args):
+        workers = []
+        for _ in range(count):
+            worker = threading.Thread(target=target, args=args, daemon=True)
+            worker.start()
+            workers.append(worker)
+        return workers
+
+    def stop_workers(self, workers, work_queue):
+        work_queue.close()
+        for worker in workers:
+            worker.join()
+
+    def record_failure(self, sync_state):
+        with self.sync_state_lock:
+            sync_state["failed_count"] += 1
+
+    def record_unmatched(self, sync_state):
+        with self.sync_state_lock:
+            sync_state["unmatched_count"] += 1
+
+    def search_worker(self, search_queue):
+        while True:
+            task = search_queue.get()
+            if task is None:
+                break
+            try:
+                task_function, task_args = task
+                task_function(*task_args)
+
+            except Exception as e:
+                self.logger.error(f"Error in Search Queue: {str(e)}")
+
+            finally:
+                search_queue.task_done()
+
+    def download_worker(self, download_queue, post_process_queue):
+        while True:
+            song = download_queue.get()
+            if song is None:
+                break
+            try:
+                self.download_song(song, post_process_queue)
+
+            except Exception as e:
+                self.logger.error(f"Error in Download Queue: {str(e)}")
+                self.record_failure(song["sync_state"])
+
+            finally:
+                download_queue.task_done()
+
+    def post_process_worker(self, post_process_queue):
+        while True:
+            item = post_process_queue.get()
+            if item is None:
+                break
+            try:
+                self.post_process_song(*item)
 
+            except Exception as e:
+                self.logger.error(f"Error in Post Processing Queue: {str(e)}")
+                self.record_failure(item[0]["sync_state"])
+
+            finally:
+                post_process_queue.task_done()
+
+    def get_download_options(self):
         ydl_opts = {
             "logger": self.logger,
-            "ffmpeg_location": "/usr/bin/ffmpeg",
             "format": "bestaudio",
-            "outtmpl": f"{full_file_path}.%(ext)s",
-            "paths": {"home": self.download_folder, "temp": temp_dir.name},
             "quiet": False,
+            "noprogress": True,
             "progress_hooks": [self.progress_callback],
-            "writethumbnail": True,
             "updatetime": False,
+        }
+
+        if self.cookies_path:
+            ydl_opts["cookiefile"] = self.cookies_path
+
+        if self.bandwidth_limiter.enabled:
+            # Fixed size blocks keep the bandwidth limit smooth and the share between downloads even
+            ydl_opts["buffersize"] = 64 * 1024
+            ydl_opts["noresizebuffer"] = True
+
+        return ydl_opts
+
+    def get_post_process_options(self):
+        if self.audio_format == "native":
+            # Keep the downloaded opus/m4a stream and only remux it into an audio container
+            extract_audio = {"key": "FFmpegExtractAudio", "preferredcodec": "best"}
+        else:
+            extract_audio = {"key": "FFmpegExtractAudio", "preferredcodec": "mp3", "preferredquality": "0"}
+
+        # The FFmpeg post-processors run ffmpeg as a child process, so each post-processing worker drives one ffmpeg process at a time
+        ydl_opts = {
+            "logger": self.logger,
+            "ffmpeg_location": self.FFMPEG_LOCATION,
+            "quiet": False,
+            "postprocessor_hooks": [self.postprocessor_callback],
             "postprocessors": [
-                {
-                    "key": "FFmpegExtractAudio",
-                    "preferredcodec": "mp3",
-                    "preferredquality": "0",
-                },
+                extract_audio,
                 {
                     "key": "EmbedThumbnail",
                 },
@@ -367,60 +1956,323 @@ class DataHandler:
             ],
         }
 
-        if self.crop_album_art == "true":
-            ydl_opts["postprocessor_args"] = {"thumbnailsconvertor+ffmpeg_o": ["-c:v", "mjpeg", "-vf", "crop='if(gt(ih,iw),iw,ih)':'if(gt(iw,ih),ih,iw)'"]}
+        return ydl_opts
 
-        if self.cookies_path:
-            ydl_opts["cookiefile"] = self.cookies_path
+    def download_song(self, song, post_process_queue):
+        temp_dir = tempfile.TemporaryDirectory(dir=self.temp_folder, ignore_cleanup_errors=True)
+
+        link = song["link"]
+        title = song["title"]
+        progress_key = self.get_progress_key(song)
 
         try:
-            yt_downloader = yt_dlp.YoutubeDL(ydl_opts)
+            if self.reuse_stored_track(song) or self.join_inflight_track(song):
+                return
+
+            self.rate_limiters["youtube"].acquire()
+            yt_downloader = self.client_pool.youtube_dl("download", self.get_download_options)
+            yt_downloader.params["outtmpl"]["default"] = f"{title}.%(ext)s"
+            yt_downloader.params["paths"] = {"home": temp_dir.name}
             self.logger.warning(f"yt_dlp - Starting Download of: {link}")
+            self.progress_tracker.update(progress_key, "downloading", percent=0)
+            self.update_track_state(song, "downloading")
 
-            yt_downloader.download([link])
+            download_start_time = time.monotonic()
+            with self.trace_span("yt_dlp.download", "download", title=title, link=link):
+                info = self.concurrency_limiters["download"].call(yt_downloader.extract_info, link, download=True, extra_info={"syncify_progress_key": progress_key})
+            track_info = {**info, **info["requested_downloads"][0]}
             self.logger.warning(f"yt_dlp - Finished Download of: {link}")
+            self.progress_tracker.update(progress_key, "processing", percent=100)
+            self.update_track_state(song, "transcoding")
+            self.metrics.observe("syncify_download_seconds", time.monotonic() - download_start_time)
+            self.metrics.inc("syncify_downloads_total", result="success")
 
-            time.sleep(sleep)
+            post_process_queue.put(song["playlist"]["Name"], (song, track_info, temp_dir))
+            temp_dir = None
 
         except Exception as e:
             self.logger.error(f"Error downloading song: {link}. Error message: {e}")
+            self.progress_tracker.update(progress_key, "failed")
+            self.update_track_state(song, "failed")
+            self.metrics.inc("syncify_downloads_total", result="failed")
+            self.record_failure(song["sync_state"])
+            self.release_inflight_track(song, failed=True)
 
         finally:
-            temp_dir.cleanup()
+            if temp_dir:
+                temp_dir.cleanup()
 
-    def progress_callback(self, d):
-        if d["status"] == "finished":
-            self.logger.warning("Download complete")
-            self.logger.warning("Processing File...")
+    def get_progress_key(self, song):
+        return (song["playlist"]["Name"], song["title"])
 
-        elif d["status"] == "downloading":
-            self.logger.warning(f'Downloaded {d["_percent_str"]} of {d["_total_bytes_str"]} at {d["_speed_str"]}')
+    def get_video_id(self, link):
+        return parse_qs(urlparse(link).query).get("v", [None])[0]
+
+    def get_playlist_file_path(self, playlist_folder):
+        return os.path.join(self.download_folder, f"{playlist_folder}.m3u")
 
-    def master_queue(self):
+    def get_playlist_file_names(self, playlist_folder):
+        if self.track_store_mode != "m3u":
+            return set()
         try:
-            self.sync_in_progress_flag = True
-            self.media_server_scan_req_flag = False
-            self.logger.warning("Sync Task started...")
-            for playlist in self.sync_list:
-                logging.warning(f'Looking for Playlist Songs on YouTube: {playlist["Name"]}')
-                song_list = self.get_download_list(playlist)
+            with open(self.get_playlist_file_path(playlist_folder), "r", encoding="utf-8") as playlist_file:
+                return {self.string_cleaner(os.path.splitext(os.path.basename(line.strip()))[0]) for line in playlist_file if line.strip() and not line.startswith("#")}
+
+        except FileNotFoundError:
+            return set()
+
+    def add_playlist_file_entry(self, playlist_folder, path):
+        entry = os.path.relpath(path, self.download_folder).replace(os.sep, "/")
+        playlist_file_path = self.get_playlist_file_path(playlist_folder)
+        with self.playlist_file_lock:
+            entries = []
+            if os.path.exists(playlist_file_path):
+                with open(playlist_file_path, "r", encoding="utf-8") as playlist_file:
+                    entries = [line.strip() for line in playlist_file if line.strip() and not line.startswith("#")]
+            if entry not in entries:
+                with open(playlist_file_path, "a", encoding="utf-8") as playlist_file:
+                    playlist_file.write(f"{entry}\n")
+
+    def reuse_stored_track(self, song):
+        if self.track_store_mode not in ("hardlink", "m3u"):
+            return False
+        video_id = self.get_video_id(song["link"])
+        stored_path = self.track_store.get(video_id) if video_id else None
+        if not stored_path:
+            return False
+
+        playlist_folder_full_path = os.path.abspath(os.path.join(self.download_folder, song["playlist_folder"]))
+        if self.track_store_mode == "m3u":
+            self.add_playlist_file_entry(song["playlist_folder"], stored_path)
+            self.logger.warning(f"Added Song from Track Store to Playlist File: {song['title']} : {stored_path}")
 
-                logging.warning(f'Starting Downloading List: {playlist["Name"]}')
-                self.download_queue(song_list, playlist)
+        else:
+            target_path = os.path.join(playlist_folder_full_path, f"{song['title']}{os.path.splitext(stored_path)[1]}")
+            if not os.path.exists(target_path):
+                try:
+                    os.link(stored_path, target_path)
+
+                except OSError:
+                    # Fall back to a copy when the library is on a file system without hardlinks
+                    shutil.copy2(stored_path, target_path)
+            self.logger.warning(f"Linked Song from Track Store: {song['title']} : {stored_path}")
+
+        self.progress_tracker.update(self.get_progress_key(song), "done", percent=100)
+        self.update_track_state(song, "done")
+        self.metrics.inc("syncify_downloads_total", result="reused")
+        with self.sync_state_lock:
+            self.changed_folders.add(song["playlist_folder"])
+        return True
+
+    def join_inflight_track(self, song):
+        video_id = self.get_video_id(song["link"])
+        if not video_id or self.track_store_mode not in ("hardlink", "m3u"):
+            return False
+        with self.sync_state_lock:
+            waiting_songs = self.inflight_tracks.get(video_id)
+            if waiting_songs is None:
+                self.inflight_tracks[video_id] = []
+                song["inflight_owner"] = True
+                return False
+            waiting_songs.append(song)
+        self.logger.warning(f"Song already being downloaded for another playlist, waiting for it: {song['title']}")
+        return True
+
+    def release_inflight_track(self, song, failed=False):
+        # Only the song that registered the download may release it and hand the result to the waiting songs
+        if not song.pop("inflight_owner", False):
+            return
+        video_id = self.get_video_id(song["link"])
+        with self.sync_state_lock:
+            waiting_songs = self.inflight_tracks.pop(video_id, [])
+
+        for waiting_song in waiting_songs:
+            try:
+                if failed or not self.reuse_stored_track(waiting_song):
+                    raise Exception("download for another playlist failed")
 
-                logging.warning(f'Finished Downloading List: {playlist["Name"]}')
+            except Exception as e:
+                self.logger.error(f"Error reusing song: {waiting_song['link']}. Error message: {e}")
+                self.progress_tracker.update(self.get_progress_key(waiting_song), "failed")
+                self.update_track_state(waiting_song, "failed")
+                self.record_failure(waiting_song["sync_state"])
+
+    def store_track(self, song, path):
+        video_id = self.get_video_id(song["link"])
+        if video_id and self.track_store_mode in ("hardlink", "m3u"):
+            self.track_store.put(video_id, os.path.abspath(path))
+        if self.track_store_mode == "m3u":
+            self.add_playlist_file_entry(song["playlist_folder"], path)
+
+    def post_process_song(self, song, track_info, temp_dir):
+        try:
+            track_info["__finaldir"] = os.path.abspath(os.path.join(self.download_folder, song["playlist_folder"]))
+            yt_post_processor = self.client_pool.youtube_dl("post_process", self.get_post_process_options)
+            self.logger.warning(f"yt_dlp - Processing File: {song['title']}")
+
+            post_process_start_time = time.monotonic()
+            with self.trace_span("artwork", "post_process", title=song["title"]):
+                track_info["thumbnails"] = self.get_artwork(track_info, temp_dir.name, song["title"])
+            with self.trace_span("yt_dlp.post_process", "post_process", title=song["title"]):
+                track_info = yt_post_processor.post_process(track_info["filepath"], track_info)
+            self.store_track(song, track_info["filepath"])
+            self.release_inflight_track(song)
+            self.logger.warning(f"yt_dlp - Finished Processing File: {song['title']}")
+            self.progress_tracker.update(self.get_progress_key(song), "done", percent=100)
+            self.update_track_state(song, "done")
+            with self.sync_state_lock:
+                self.changed_folders.add(song["playlist_folder"])
+            self.metrics.observe("syncify_post_process_seconds", time.monotonic() - post_process_start_time)
+            self.metrics.inc("syncify_post_process_total", result="success")
+
+        except Exception as e:
+            self.logger.error(f"Error processing song: {song['link']}. Error message: {e}")
+            self.progress_tracker.update(self.get_progress_key(song), "failed")
+            self.update_track_state(song, "failed")
+            self.metrics.inc("syncify_post_process_total", result="failed")
+            self.record_failure(song["sync_state"])
+            self.release_inflight_track(song, failed=True)
 
-                playlist["Song_Count"] = len(os.listdir(os.path.join(self.download_folder, playlist["Name"])))
-                logging.warning(f'Files in Directory: {str(playlist["Song_Count"])}')
+        finally:
+            temp_dir.cleanup()
 
+    def get_artwork(self, track_info, folder, title):
+        thumbnail_url = track_info.get("thumbnail")
+        if not thumbnail_url:
+            return []
+
+        album_artist = track_info.get("artist") or track_info.get("uploader")
+        artwork_key = f"album:{album_artist}:{track_info['album']}" if track_info.get("album") else thumbnail_url
+        try:
+            artwork_path, cached = self.artwork_cache.get(artwork_key, thumbnail_url)
+            self.metrics.inc("syncify_artwork_cache_total", result="hit" if cached else "miss")
+
+        except Exception as e:
+            self.logger.warning(f"Error Getting Album Art for {title}: {str(e)}")
+            self.metrics.inc("syncify_artwork_cache_total", result="failed")
+            return []
+
+        # EmbedThumbnail deletes the image after embedding it, so it gets its own copy of the cached art
+        thumbnail_path = os.path.join(folder, f"{title}.jpg")
+        shutil.copyfile(artwork_path, thumbnail_path)
+        return [{"url": thumbnail_url, "filepath": thumbnail_path}]
+
+    def progress_callback(self, d):
+        # download_song passes its progress key to yt_dlp as extra info, so it comes back with every progress update
+        progress_key = d.get("info_dict", {}).get("syncify_progress_key")
+        track = d.get("filename")
+        if d["status"] == "finished":
+            downloaded_bytes = d.get("total_bytes") or d.get("downloaded_bytes") or 0
+            self.metrics.inc("syncify_download_bytes_total", downloaded_bytes)
+            if d.get("elapsed"):
+                self.metrics.set("syncify_download_speed_bytes_per_second", downloaded_bytes / d["elapsed"])
+
+        elif d["status"] == "downloading":
+            downloaded_bytes = d.get("downloaded_bytes") or 0
+            if getattr(self.bandwidth_state, "track", None) != track:
+                self.bandwidth_state.track = track
+                self.bandwidth_state.downloaded_bytes = 0
+            self.bandwidth_limiter.acquire(downloaded_bytes - self.bandwidth_state.downloaded_bytes)
+            self.bandwidth_state.downloaded_bytes = downloaded_bytes
+
+            total_bytes = d.get("total_bytes") or d.get("total_bytes_estimate")
+            percent = round(d.get("downloaded_bytes", 0) * 100 / total_bytes, 1) if total_bytes else None
+            if progress_key:
+                self.progress_tracker.update(progress_key, "downloading", percent=percent, speed=d.get("speed"), eta=d.get("eta"))
+
+    def postprocessor_callback(self, d):
+        trace = self.trace
+        if not trace:
+            return
+        if d["status"] == "started":
+            trace.start_step(d["postprocessor"])
+        elif d["status"] == "finished":
+            trace.finish_step(d["postprocessor"], "post_process", file=os.path.basename(d["info_dict"].get("filepath") or ""))
+
+    def emit_progress(self, tracks, concurrency):
+        self.publish_event("progress", {"tracks": tracks, "concurrency": concurrency})
+
+    def get_concurrency_state(self):
+        return {name: limiter.state() for name, limiter in self.concurrency_limiters.items()}
+
+    def master_queue(self, force=False, playlists=None, run_id=None):
+        sync_start_time = time.monotonic()
+        self.trace = self.start_trace() if self.sync_trace == "true" else None
+        trace_start_time = self.trace.timestamp() if self.trace else None
+        run_started = False
+        try:
+            self.metrics.set("syncify_sync_in_progress", 1)
+            self.changed_folders = set()
+            self.logger.warning("Sync Task started...")
+            run_id, force, resumed = self.sync_journal.start_run(force, run_id)
+            run_started = True
+            if resumed:
+                self.logger.warning(f"Resuming Sync Run: {run_id}")
+            search_queue = FairQueue()
+            download_queue = FairQueue(maxsize=self.max_download_thread_limit * 2)
+            post_process_queue = FairQueue(maxsize=self.post_process_thread_limit * 2)
+            self.active_queues = {"search": search_queue, "download": download_queue, "post_process": post_process_queue}
+            self.progress_tracker.start()
+
+            sync_states = []
+            for playlist in self.sync_list if playlists is None else playlists:
+                sync_state = {"run_id": run_id, "force": force, "skipped": False, "snapshot_id": None, "failed_count": 0, "unmatched_count": 0}
+                if self.trace:
+                    sync_state.update(trace_open_tracks=0, trace_extracted=False, trace_finished=False)
+                    self.trace.begin(playlist["Name"], "playlist", playlist["Name"])
+                search_queue.put(playlist["Name"], (self.get_download_list, (playlist, search_queue, download_queue, sync_state)), self.get_playlist_priority(playlist))
+                sync_states.append((playlist, sync_state))
+
+            search_workers = self.start_workers(self.search_worker, self.max_search_thread_limit, search_queue)
+            download_workers = self.start_workers(self.download_worker, self.max_download_thread_limit, download_queue, post_process_queue)
+            post_process_workers = self.start_workers(self.post_process_worker, self.post_process_thread_limit, post_process_queue)
+            try:
+                search_queue.join()
+                self.logger.warning("Finished Searching all Playlists")
+
+            finally:
+                self.stop_workers(search_workers, search_queue)
+                self.stop_workers(download_workers, download_queue)
+                self.stop_workers(post_process_workers, post_process_queue)
+                self.active_queues = {}
+                self.progress_tracker.stop()
+                if self.trace:
+                    for playlist, sync_state in sync_states:
+                        self.trace_playlist_finished(playlist["Name"], sync_state, force=True)
+
+            for playlist, sync_state in sync_states:
                 playlist["Last_Synced"] = datetime.datetime.now().strftime("%d-%m-%y %H:%M:%S")
+                if sync_state["skipped"]:
+                    self.metrics.inc("syncify_playlists_total", result="unchanged")
+                    continue
 
-            self.save_sync_list_to_file()
-            data = {"sync_list": self.sync_list}
-            socketio.emit("Update", data)
+                self.metrics.inc("syncify_playlists_total", result="complete" if sync_state["failed_count"] == 0 else "incomplete")
 
-            if self.media_server_scan_req_flag == True and self.media_server_tokens:
-                self.sync_media_servers()
+                logging.warning(f'Finished Downloading List: {playlist["Name"]}')
+                playlist_folder_full_path = os.path.join(self.download_folder, playlist["Name"])
+                if os.path.isdir(playlist_folder_full_path):
+                    # Files are counted as they are, songs only listed in the playlist file are added on top
+                    linked_names = self.get_playlist_file_names(playlist["Name"]) - self.library_index.get_names(playlist_folder_full_path)
+                    playlist["Song_Count"] = len(os.listdir(playlist_folder_full_path)) + len(linked_names)
+                    logging.warning(f'Files in Directory: {str(playlist["Song_Count"])}')
+
+                # Songs without a match are searched again on the next sync once their search cache entry has expired
+                playlist["Snapshot_ID"] = sync_state["snapshot_id"] if sync_state["failed_count"] == 0 and sync_state["unmatched_count"] == 0 else None
+
+            result_fields = ("Name", "Last_Synced", "Song_Count", "Snapshot_ID")
+            self.publish_event("playlist_update", {"playlists": [{field: playlist.get(field) for field in result_fields} for playlist, _ in sync_states]})
+            evicted_count = self.search_cache.evict()
+            self.logger.warning(f"Search Cache entries evicted: {evicted_count}")
+            evicted_count = self.artwork_cache.evict()
+            self.logger.warning(f"Album Art Cache entries evicted: {evicted_count}")
+
+            if self.changed_folders and self.media_server_tokens:
+                self.logger.warning(f"Media Server Scan requested for: {', '.join(sorted(self.changed_folders))}")
+                if self.trace:
+                    # The trace is written again once the debounced scan has finished
+                    with self.sync_state_lock:
+                        self.media_scan_traces.append(self.trace)
+                self.media_scan_debouncer.request(self.changed_folders)
             else:
                 self.logger.warning("Media Server Sync not required")
 
@@ -432,59 +2284,117 @@ class DataHandler:
             self.logger.warning("Finished: Complete")
 
         finally:
-            self.sync_in_progress_flag = False
+            # The job of a failed run is completed as well, so its journal rows would never be resumed or removed
+            if run_started:
+                try:
+                    self.sync_journal.finish_run(run_id)
+
+                except Exception as e:
+                    self.logger.error(f"Error Finishing Sync Journal Run: {str(e)}")
+            self.metrics.set("syncify_sync_in_progress", 0)
+            self.metrics.observe("syncify_sync_seconds", time.monotonic() - sync_start_time)
+            if self.trace:
+                self.trace.add_span("sync", "sync", trace_start_time, run_id=run_id, force=force)
+                self.save_trace(self.trace)
+                self.trace = None
+
+    def render_metrics(self):
+        self.update_queue_metrics()
+        now = time.monotonic()
+        worker_snapshots = []
+        for worker, (received, snapshot) in list(self.worker_metrics.items()):
+            # Workers report with every heartbeat, a worker that stopped reporting is dropped
+            if now - received > self.job_queue.stale_after:
+                self.worker_metrics.pop(worker, None)
+            else:
+                worker_snapshots.append((worker, snapshot))
+        return self.metrics.render(worker_snapshots)
+
+    def update_queue_metrics(self):
+        for queue_name in ("search", "download", "post_process"):
+            work_queue = self.active_queues.get(queue_name)
+            self.metrics.set("syncify_queue_depth", work_queue.size if work_queue else 0, queue=queue_name)
+        for stage, state in self.get_concurrency_state().items():
+            self.metrics.set("syncify_concurrency_limit", state["limit"], stage=stage)
+            self.metrics.set("syncify_backoff_seconds", state["backoff"], stage=stage)
+        self.metrics.set("syncify_bandwidth_limit_bytes_per_second", self.bandwidth_limiter.current_rate())
 
     def add_playlist(self, playlist):
         self.sync_list.extend(playlist)
+        self.save_sync_list_to_file()
+        self.refresh_schedule()
+        self.publish_playlist_changes(changed=playlist, reordered=True)
 
-    def sync_media_servers(self):
+    def run_media_scan(self, folders):
+        with self.sync_state_lock:
+            scan_traces = self.media_scan_traces
+            self.media_scan_traces = []
+
+        with contextlib.ExitStack() as trace_spans:
+            for trace in scan_traces:
+                trace_spans.enter_context(trace.span("media_server_scan", "media_server", folders=folders))
+            self.sync_media_servers(folders)
+
+        for trace in scan_traces:
+            self.save_trace(trace)
+
+    def sync_media_servers(self, folders):
         media_servers = self.convert_string_to_dict(self.media_server_addresses)
         media_tokens = self.convert_string_to_dict(self.media_server_tokens)
+        # Without the library path as seen by the media server only a full library scan is possible
+        scan_paths = [f"{self.media_server_library_path}/{folder}" for folder in folders] if self.media_server_library_path else []
 
         if "Plex" in media_servers and "Plex" in media_tokens:
             try:
                 token = media_tokens.get("Plex")
                 address = media_servers.get("Plex")
                 self.logger.warning("Attempting Plex Sync")
+                from plexapi.server import PlexServer
+
                 media_server_server = PlexServer(address, token)
                 library_section = media_server_server.library.section(self.media_server_library_name)
-                library_section.update()
-                self.logger.warning(f"Plex Library scan for '{self.media_server_library_name}' started.")
+                if scan_paths:
+                    for scan_path in scan_paths:
+                        library_section.update(path=scan_path)
+                    self.logger.warning(f"Plex scan started for: {', '.join(scan_paths)}")
+                else:
+                    library_section.update()
+                    self.logger.warning(f"Plex Library scan for '{self.media_server_library_name}' started.")
+                self.metrics.inc("syncify_media_server_scans_total", server="plex", result="success")
 
             except Exception as e:
                 self.logger.warning(f"Plex Library scan failed: {str(e)}")
+                self.metrics.inc("syncify_media_server_scans_total", server="plex", result="failed")
 
-        if "Jellyfin" in media_tokens and "Jellyfin" in media_tokens:
+        if "Jellyfin" in media_servers and "Jellyfin" in media_tokens:
             try:
                 token = media_tokens.get("Jellyfin")
                 address = media_servers.get("Jellyfin")
                 self.logger.warning("Attempting Jellyfin Sync")
-                url = f"{address}/Library/Refresh?api_key={token}"
-                response = requests.post(url)
+                import requests
+
+                if scan_paths:
+                    updates = {"Updates": [{"Path": scan_path, "UpdateType": "Modified"} for scan_path in scan_paths]}
+                    response = requests.post(f"{address}/Library/Media/Updated", json=updates, headers={"X-Emby-Token": token})
+                else:
+                    response = requests.post(f"{address}/Library/Refresh?api_key={token}")
                 if response.status_code == 204:
                     self.logger.warning("Jellyfin Library refresh request successful.")
+                    self.metrics.inc("syncify_media_server_scans_total", server="jellyfin", result="success")
                 else:
                     self.logger.warning(f"Jellyfin Error: {response.status_code}, {response.text}")
+                    self.metrics.inc("syncify_media_server_scans_total", server="jellyfin", result="failed")
 
             except Exception as e:
                 self.logger.warning(f"Jellyfin Library scan failed: {str(e)}")
+                self.metrics.inc("syncify_media_server_scans_total", server="jellyfin", result="failed")
 
     def string_cleaner(self, input_string):
         if isinstance(input_string, str):
-            raw_string = re.sub(r'[\/:*?"<>|]', " ", input_string)
-            temp_string = re.sub(r"\s+", " ", raw_string)
-            cleaned_string = temp_string.strip()
-            return cleaned_string
+            return TrackMatcher.clean(input_string)
 
         elif isinstance(input_string, list):
-            cleaned_strings = []
-            for string in input_string:
-                file_name_without_extension, file_extension = os.path.splitext(string)
-                raw_string = re.sub(r'[\/:*?"<>|]', " ", file_name_without_extension)
-                temp_string = re.sub(r"\s+", " ", raw_string)
-                cleaned_string = temp_string.strip()
-                cleaned_strings.append(cleaned_string)
-            return cleaned_strings
+            return [TrackMatcher.clean(os.path.splitext(string)[0]) for string in input_string]
 
     def convert_string_to_dict(self, raw_string):
         result = {}
@@ -503,13 +2413,22 @@ class DataHandler:
     def manual_start(self):
         self.logger.warning("Manual Sync Requested.")
 
-        if self.sync_in_progress_flag == True:
-            self.logger.warning(f"Sync already in progress.")
+        try:
+            active_jobs = self.job_queue.active_jobs()
+            for job in active_jobs:
+                self.logger.warning(f"Sync job {job['job_id']} already {job['state']} for: {', '.join(playlist['Name'] for playlist in job['payload']['playlists'])}")
+
+            # Playlists that are already queued or running are left to their job, all others are synced now
+            queued_names = {playlist["Name"] for job in active_jobs for playlist in job["payload"]["playlists"]}
+            playlists = [playlist for playlist in self.sync_list if playlist["Name"] not in queued_names]
+            if playlists:
+                self.logger.warning("Manual Sync Started.")
+                self.submit_sync(playlists, force=True)
+            else:
+                self.logger.warning("Sync already in progress.")
 
-        else:
-            self.logger.warning("Manual Sync Started.")
-            task_thread = threading.Thread(target=self.master_queue, daemon=True)
-            task_thread.start()
+        except Exception as e:
+            self.logger.error(f"Error Starting Manual Sync: {str(e)}")
 
 
 app = Flask(__name__)
@@ -524,10 +2443,21 @@ def home():
     return render_template("base.html")
 
 
+@app.route("/metrics")
+def metrics():
+    return Response(data_handler.render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
 @socketio.on("connect")
 def connection():
-    data = {"sync_list": data_handler.sync_list}
-    socketio.emit("Update", data)
+    data = {"sync_list": data_handler.sync_list, "version": data_handler.sync_list_version}
+    socketio.emit("Update", data, to=request.sid)
+
+
+@socketio.on("request_sync_list")
+def request_sync_list():
+    data = {"sync_list": data_handler.sync_list, "version": data_handler.sync_list_version}
+    socketio.emit("Update", data, to=request.sid)
 
 
 @socketio.on("loadSettings")
@@ -540,7 +2470,7 @@ def loadSettings():
         "spotify_client_id": data_handler.spotify_client_id,
         "spotify_client_secret": data_handler.spotify_client_secret,
     }
-    socketio.emit("settingsLoaded", data)
+    socketio.emit("settingsLoaded", data, to=request.sid)
 
 
 @socketio.on("save_playlist_settings")
@@ -554,8 +2484,11 @@ def save_playlist_settings(data):
                 break
         else:
             data_handler.sync_list.append(playlist_to_be_saved)
+            playlist = playlist_to_be_saved
 
         data_handler.save_sync_list_to_file()
+        data_handler.refresh_schedule()
+        return data_handler.publish_playlist_changes(changed=[playlist], reordered=playlist is playlist_to_be_saved, skip_sid=request.sid)
 
     except Exception as e:
         data_handler.logger.error(f"Error Saving Playlist Settings: {str(e)}")
@@ -586,6 +2519,7 @@ def updateSettings(data):
     finally:
         data_handler.logger.warning(f"Sync Times: {str(data_handler.sync_start_times)}")
         data_handler.save_to_file()
+        data_handler.refresh_schedule()
 
 
 @socketio.on("add_playlist")
@@ -595,8 +2529,7 @@ def add_playlist(data):
 
 @socketio.on("save_playlists")
 def save_playlists(data):
-    data_handler.sync_list = data["Saved_sync_list"]
-    data_handler.save_sync_list_to_file()
+    return data_handler.replace_sync_list(data["Saved_sync_list"], skip_sid=request.sid)
 
 
 @socketio.on("manual_start")
@@ -604,5 +2537,11 @@ def manual_start():
     data_handler.manual_start()
 
 
+# Importing the module does not start the sync engine, gunicorn starts it from the post_worker_init hook in gunicorn_config.py
 if __name__ == "__main__":
-    socketio.run(app, host="0.0.0.0", port=5000)
+    if "--worker" in sys.argv:
+        data_handler.run_worker()
+
+    else:
+        data_handler.start_web()
+        socketio.run(app, host="0.0.0.0", port=5000)
@@ -12,6 +12,7 @@ var media_server_library_name = document.getElementById("media_server_library_na
 var spotify_client_id = document.getElementById("spotify_client_id");
 var spotify_client_secret = document.getElementById("spotify_client_secret");
 var playlists = [];
+var sync_list_version = null;
 var socket = io();
 
 function renderPlaylists() {
@@ -51,10 +52,46 @@ function createDeleteButton(index) {
 
 function updated_info(response) {
     playlists = response.sync_list;
+    sync_list_version = response.version;
     renderPlaylists();
     createEditModalsAndListeners();
 }
 
+function apply_playlist_delta(delta) {
+    if (delta.base_version !== sync_list_version) {
+        socket.emit("request_sync_list");
+        return;
+    }
+    delta.removed.forEach((name) => {
+        playlists = playlists.filter((playlist) => playlist.Name !== name);
+    });
+    delta.changed.forEach((changed_playlist) => {
+        var index = playlists.findIndex((playlist) => playlist.Name === changed_playlist.Name);
+        if (index === -1) {
+            playlists.push(changed_playlist);
+        } else {
+            playlists[index] = changed_playlist;
+        }
+    });
+    if (delta.order) {
+        playlists.sort((a, b) => delta.order.indexOf(a.Name) - delta.order.indexOf(b.Name));
+    }
+    sync_list_version = delta.version;
+    renderPlaylists();
+    createEditModalsAndListeners();
+}
+
+function acknowledge_playlist_change(version) {
+    if (version === undefined) {
+        return;
+    }
+    if (version === sync_list_version + 1) {
+        sync_list_version = version;
+    } else {
+        socket.emit("request_sync_list");
+    }
+}
+
 function createEditModalsAndListeners() {
     playlists.forEach((playlist, index) => {
         var editModal = document.createElement("div");
@@ -79,8 +116,12 @@ function createEditModalsAndListeners() {
                                     <input type="text" class="form-control" id="playlistLink${index}" value="${playlist.Link}">
                                 </div>
                                 <div class="form-group">
-                                    <label for="playlistSleep${index}">Sleep Interval between downloads (Seconds):</label>
-                                    <input type="number" class="form-control" min=0 id="playlistSleep${index}" value="${playlist.Sleep}">
+                                    <label for="playlistPriority${index}">Priority (higher syncs first):</label>
+                                    <input type="number" class="form-control" id="playlistPriority${index}" value="${playlist.Priority || 0}">
+                                </div>
+                                <div class="form-group my-4">
+                                    <label for="playlistSchedule${index}">Schedule (e.g. 6h, 30m or a cron expression, blank uses the Sync Schedule):</label>
+                                    <input type="text" class="form-control" id="playlistSchedule${index}" value="${playlist.Schedule || ""}">
                                 </div>
                             </form>
                         </div>
@@ -99,8 +140,9 @@ function createEditModalsAndListeners() {
 function savePlaylistSettings(index) {
     playlists[index].Name = document.getElementById(`playlistName${index}`).value;
     playlists[index].Link = document.getElementById(`playlistLink${index}`).value;
-    playlists[index].Sleep = parseInt(document.getElementById(`playlistSleep${index}`).value, 10);
-    socket.emit("save_playlist_settings", { "playlist": playlists[index] });
+    playlists[index].Priority = parseInt(document.getElementById(`playlistPriority${index}`).value, 10) || 0;
+    playlists[index].Schedule = document.getElementById(`playlistSchedule${index}`).value.trim();
+    socket.emit("save_playlist_settings", { "playlist": playlists[index] }, acknowledge_playlist_change);
     var save_message_playlist_edit = document.getElementById(`save-message-playlist-edit${index}`);
     save_message_playlist_edit.style.display = "block";
     setTimeout(function () {
@@ -110,9 +152,76 @@ function savePlaylistSettings(index) {
 }
 
 socket.on("Update", updated_info);
+socket.on("playlist_delta", apply_playlist_delta);
+
+var track_progress = {};
+
+function formatSpeed(speed) {
+    if (!speed) {
+        return "";
+    }
+    var units = ["B/s", "KiB/s", "MiB/s", "GiB/s"];
+    var unit_index = 0;
+    while (speed >= 1024 && unit_index < units.length - 1) {
+        speed /= 1024;
+        unit_index++;
+    }
+    return `${speed.toFixed(1)} ${units[unit_index]}`;
+}
+
+function renderProgress() {
+    var progressList = document.getElementById("progress-list");
+    var tracks = Object.values(track_progress);
+    document.getElementById("progress-container").style.display = tracks.length ? "block" : "none";
+    progressList.innerHTML = "";
+    tracks.forEach((track) => {
+        var row = document.createElement("tr");
+        var percent = track.percent === null ? 0 : track.percent;
+        row.innerHTML = `
+                <td>${track.track}</td>
+                <td>${track.playlist}</td>
+                <td>${track.status}</td>
+                <td>
+                    <div class="progress">
+                        <div class="progress-bar" role="progressbar" style="width: ${percent}%">${percent}%</div>
+                    </div>
+                </td>
+                <td>${formatSpeed(track.speed)}</td>
+                <td>${track.eta === null ? "" : track.eta + "s"}</td>
+            `;
+        progressList.appendChild(row);
+    });
+}
+
+function renderConcurrency(concurrency) {
+    if (!concurrency) {
+        return;
+    }
+    var states = Object.entries(concurrency);
+    var stages = states.map(([stage, state]) => {
+        var backoff = state.backoff > 0 ? `, backing off ${state.backoff}s` : "";
+        return `${stage}: ${state.in_flight}/${state.limit} active (max ${state.max_limit})${backoff}`;
+    });
+    // Kept outside the progress table so a backoff during the search stage is visible before any download starts
+    var active = states.some(([stage, state]) => state.in_flight > 0 || state.backoff > 0);
+    document.getElementById("concurrency-container").style.display = active ? "block" : "none";
+    document.getElementById("concurrency-status").textContent = stages.join(" | ");
+}
+
+socket.on("progress", function (response) {
+    renderConcurrency(response.concurrency);
+    response.tracks.forEach((track) => {
+        if (track.status === "done" || track.status === "failed") {
+            delete track_progress[track.id];
+        } else {
+            track_progress[track.id] = track;
+        }
+    });
+    renderProgress();
+});
 
 document.getElementById("add-playlist").addEventListener("click", function () {
-    playlists.push({ Name: "New Playlist", Link: "", Sleep: 0, Last_Synced: "Never", Song_Count: 0 });
+    playlists.push({ Name: "New Playlist", Link: "", Priority: 0, Last_Synced: "Never", Song_Count: 0 });
     renderPlaylists();
     createEditModalsAndListeners();
 });
@@ -148,7 +257,7 @@ save_changes_button.addEventListener("click", () => {
 });
 
 save_sync_list.addEventListener("click", () => {
-    socket.emit("save_playlists", { "Saved_sync_list": playlists });
+    socket.emit("save_playlists", { "Saved_sync_list": playlists }, acknowledge_playlist_change);
     save_sync_list_msg.style.display = "inline";
     save_sync_list_msg.textContent = "Saved!";
     setTimeout(function () {
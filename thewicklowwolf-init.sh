@@ -56,6 +56,18 @@ chown -R ${PUID}:${PGID} /syncify
 # Set XDG_CACHE_HOME to use the cache directory
 export XDG_CACHE_HOME=/syncify/cache
 
+# Clear partial downloads left behind by a previous run, all sync workers run inside this container
+rm -rf /syncify/downloads/.syncify_temp
+
+# Start separate sync workers if requested, otherwise the web server runs the sync itself
+SYNC_WORKERS=${sync_workers:-0}
+i=0
+while [ "$i" -lt "$SYNC_WORKERS" ]; do
+    echo "Starting sync worker $((i + 1)) of ${SYNC_WORKERS}..."
+    su-exec ${PUID}:${PGID} python src/Syncify.py --worker &
+    i=$((i + 1))
+done
+
 # Start the application with the specified user permissions
 echo "Running Syncify..."
 exec su-exec ${PUID}:${PGID} gunicorn src.Syncify:app -c gunicorn_config.py